@@ -1,47 +1,119 @@
-import io
 import os
 import shutil
+import tempfile
 import logging
+import time
+import threading
 from datetime import datetime
-from flask import Flask, request, render_template, send_file, jsonify
-from main_zhihu import ZhihuParser
-from main_csdn import CsdnParser
-from main_weixin import WeixinParser
-from main_juejin import JuejinParser
+from urllib.parse import quote
+from flask import Flask, Response, request, render_template, jsonify, url_for
+from utils.ratelimit import rate_limiter
+from utils.metrics import metrics
+from utils import logtail
+from utils.logtail import rotating_handler
+from utils.profiling import profile_call
+from utils.zipstream import stream_zip_from_directory
+from utils.jobs import JobManager
+from utils.batch import BatchDownloader, parse_url_list, parse_site_limits
+from utils.registry import SUPPORTED_WEBSITES, detect_site
+from utils import registry
 import json
-import zipfile
 
 if not os.path.exists('./logs'):
     os.makedirs('./logs')
 
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='./logs/app.log',
-    filemode='a'
+    handlers=[rotating_handler('./logs/app.log', '%(asctime)s - %(name)s - %(levelname)s - %(message)s')],
 )
 logger = logging.getLogger('web_app')
 
+# 每个请求的输出目录都创建在此目录下，默认为系统临时目录
+OUTPUT_ROOT = os.environ.get("OUTPUT_ROOT") or None
+if OUTPUT_ROOT:
+    os.makedirs(OUTPUT_ROOT, exist_ok=True)
+
 app = Flask(__name__)
 
+# 后台任务保存在进程内存中，部署时使用单进程多线程
+job_manager = JobManager(
+    max_workers=int(os.environ.get("JOB_WORKERS", 4)),
+    ttl=int(os.environ.get("JOB_TTL", 3600)),
+    cleanup_interval=int(os.environ.get("JOB_CLEANUP_INTERVAL", 60)),
+)
+
+# 批量任务：单个任务内同时处理的链接数，以及各站点的上限，例如 "zhihu=2,csdn=4"
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 8))
+BATCH_SITE_LIMITS = parse_site_limits(os.environ.get("BATCH_SITE_LIMITS"))
+# 单个批量任务最多接受的链接数
+BATCH_MAX_URLS = int(os.environ.get("BATCH_MAX_URLS", 1000))
+
+LOG_FILES = {
+    'app': './logs/app.log',
+    'zhihu': './logs/zhihu_download.log',
+    'csdn': './logs/csdn_download.log',
+    'weixin': './logs/weixin_download.log',
+    'juejin': './logs/juejin_download.log',
+}
+# 日志接口：默认返回的行数、单次按偏移读取的字节上限
+LOG_TAIL_LINES = int(os.environ.get("LOG_TAIL_LINES", 500))
+LOG_MAX_READ_BYTES = int(os.environ.get("LOG_MAX_READ_BYTES", 1024 * 1024))
+# 跟随日志的连接同样占用工作线程：单次连接的最长时间（秒，到期后浏览器按 Last-Event-ID 从下一个偏移重连），
+# 以及同时跟随的连接数，超出时返回 503
+LOG_FOLLOW_SECONDS = float(os.environ.get("LOG_FOLLOW_SECONDS", 30))
+LOG_MAX_FOLLOWERS = int(os.environ.get("LOG_MAX_FOLLOWERS", 4))
+log_followers = threading.BoundedSemaphore(LOG_MAX_FOLLOWERS)
+# 任务进度推送：两次推送的最小间隔（秒），频繁的更新合并为一次；无更新时发送心跳的间隔
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", 0.5))
+PROGRESS_KEEPALIVE = float(os.environ.get("PROGRESS_KEEPALIVE", 15))
+# 每个推送连接占用一个工作线程：单次连接的最长时间（秒，到期后浏览器按 Last-Event-ID 重连），
+# 以及同时保持的连接数，超出时返回 503，页面改为轮询
+PROGRESS_STREAM_SECONDS = float(os.environ.get("PROGRESS_STREAM_SECONDS", 30))
+PROGRESS_MAX_STREAMS = int(os.environ.get("PROGRESS_MAX_STREAMS", 4))
+progress_streams = threading.BoundedSemaphore(PROGRESS_MAX_STREAMS)
+
+
+def zip_response(directory, download_name, cleanup=True, site=None):
+    """将目录以流式 ZIP 的形式返回，cleanup 为 True 时发送完毕后删除目录"""
+    ascii_name = download_name.encode("ascii", "ignore").decode() or "download.zip"
+    headers = {
+        "Content-Disposition": f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(download_name)}"
+    }
+    return Response(
+        stream_zip_from_directory(directory, cleanup=cleanup, site=site),
+        mimetype="application/zip",
+        headers=headers,
+    )
+
 
-def create_zip_from_directory(directory, zip_path):
-    """从给定目录创建ZIP文件"""
-    supported_extensions = ['.md', '.jpg', '.png', '.gif', '.mp4', '.txt']
-    log_files = ['zhihu_download.log', 'weixin_download.log', 'csdn_download.log',]
+def create_parser(website, cookies, keep_logs, output_dir):
+    """根据网站类型创建解析器，不支持的网站返回 None
 
+    解析器模块在首次使用对应站点时才导入，每个请求只构建一个解析器
+    """
+    return registry.create_parser(website, cookies, keep_logs=keep_logs, output_dir=output_dir)
+
+
+def run_parser(parser, website, url, output_dir, profile=False):
+    """执行解析，失败时在输出目录中写入错误说明，返回 (Markdown 标题, 错误信息)
+
+    profile 为 True 时在分析器下执行，profile.prof 等文件写入输出目录，随压缩包返回
+    """
     try:
-        with zipfile.ZipFile(zip_path, "w") as zf:
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if any(file.endswith(ext) for ext in supported_extensions) or file in log_files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, directory)
-                        zf.write(file_path, arcname)
-        return True
+        if profile:
+            markdown_title = profile_call(output_dir, parser.judge_type, url)
+        else:
+            markdown_title = parser.judge_type(url)
+        logger.info(f"Successfully processed {url}, title: {markdown_title}")
+        return markdown_title, None
     except Exception as e:
-        logger.error(f"Error creating zip file: {str(e)}")
-        return False
+        logger.error(f"Error processing {website} URL {url}: {str(e)}")
+        markdown_title = f"partial_download_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        with open(os.path.join(output_dir, f"{markdown_title}_error.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Error processing URL: {url}\n")
+            f.write(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Error: {str(e)}\n")
+        return markdown_title, str(e)
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -49,60 +121,180 @@ def index():
     if request.method == "POST":
         cookies = request.form["cookies"]
         url = request.form["url"]
-        website = request.form["website"].lower()
+        # 未指定网站时按链接的主机名识别
+        website = (request.form.get("website") or detect_site(url) or "").lower()
         keep_logs = request.form.get("keep_logs") == "on"
+        profile = request.form.get("profile") in ("on", "1")
 
-        parser_map = {
-            "csdn": (CsdnParser(keep_logs=keep_logs), "csdn"),
-            "zhihu": (ZhihuParser(cookies, keep_logs=keep_logs), "zhihu"),
-            "weixin": (WeixinParser(keep_logs=keep_logs), "weixin"),
-            "juejin": (JuejinParser(keep_logs=keep_logs), "juejin")
-        }
-
-        try:
-            parser, tmpdir = parser_map[website]
-        except KeyError:
+        # 先校验网站，website 来自用户输入，会用作临时目录名的前缀
+        if website not in SUPPORTED_WEBSITES:
             logger.warning(f"Unsupported website: {website}")
             return "Unsupported website", 400
 
+        # 每个请求使用独立的输出目录，多个请求可以在同一进程中并发处理
+        tmpdir = tempfile.mkdtemp(prefix=f"{website}_", dir=OUTPUT_ROOT)
+
         try:
-            os.makedirs(tmpdir, exist_ok=True)
-            old_cwd = os.getcwd()
-            os.chdir(tmpdir)
-            
-            try:
-                markdown_title = parser.judge_type(url)
-                logger.info(f"Successfully processed {url}, title: {markdown_title}")
-            except Exception as e:
-                logger.error(f"Error processing {website} URL {url}: {str(e)}")
-                markdown_title = f"partial_download_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                with open(f"{markdown_title}_error.txt", "w", encoding="utf-8") as f:
-                    f.write(f"Error processing URL: {url}\n")
-                    f.write(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"Error: {str(e)}\n")
-            
-            os.chdir(old_cwd)
-
-            zip_path = f"{markdown_title}.zip"
-            
-            if create_zip_from_directory(tmpdir, zip_path):
-                with open(zip_path, "rb") as f:
-                    zip_data = io.BytesIO(f.read())
-
-                cleanup_files([zip_path, tmpdir])
-
-                return send_file(zip_data, download_name=f"{markdown_title}.zip", as_attachment=True)
-            else:
-                return "Failed to create zip file", 500
-                
+            parser = create_parser(website, cookies, keep_logs, tmpdir)
+            markdown_title, _ = run_parser(parser, website, url, tmpdir, profile=profile)
+            return zip_response(tmpdir, f"{markdown_title}.zip", site=website)
         except Exception as e:
-            os.chdir(old_cwd)
+            cleanup_files([tmpdir])
             logger.error(f"Error in web request for {website} URL: {e}")
             return "An error occurred while processing your request.", 500
 
     return render_template("index.html")
 
 
+def run_job(job, cookies, keep_logs, profile=False):
+    """在后台线程中执行下载任务"""
+    job.output_dir = tempfile.mkdtemp(prefix=f"{job.website}_", dir=OUTPUT_ROOT)
+    job.parser = create_parser(job.website, cookies, keep_logs, job.output_dir)
+    job.parser.progress = job.progress
+    markdown_title, job.error = run_parser(job.parser, job.website, job.url, job.output_dir, profile=profile)
+    return markdown_title
+
+
+@app.route("/api/jobs", methods=["POST"])
+def create_job():
+    """API endpoint to start a background download job"""
+    data = request.get_json(silent=True) or request.form
+    url = data.get("url")
+    website = (data.get("website") or detect_site(url or "") or "").lower()
+    cookies = data.get("cookies", "")
+    keep_logs = data.get("keep_logs") in (True, "on", "true", "1")
+    profile = data.get("profile") in (True, "on", "true", "1")
+
+    if not url:
+        return jsonify({"error": "Missing url"}), 400
+    if website not in SUPPORTED_WEBSITES:
+        logger.warning(f"Unsupported website: {website}")
+        return jsonify({"error": "Unsupported website"}), 400
+
+    job = job_manager.submit(website, url, lambda job: run_job(job, cookies, keep_logs, profile))
+    return jsonify({
+        "job_id": job.id,
+        "events_url": url_for("get_job_events", job_id=job.id),
+        "status_url": url_for("get_job", job_id=job.id),
+        "result_url": url_for("get_job_result", job_id=job.id),
+    }), 202
+
+
+def run_batch_job(job, urls, cookies, keep_logs, profile=False):
+    """在后台线程中批量下载多个链接"""
+    job.output_dir = tempfile.mkdtemp(prefix="batch_", dir=OUTPUT_ROOT)
+    job.parser = BatchDownloader(job.output_dir, cookies=cookies, keep_logs=keep_logs,
+                                 max_workers=BATCH_WORKERS, site_limits=BATCH_SITE_LIMITS, profile=profile)
+    job.parser.progress = job.progress
+    job.parser.run(urls)
+    return f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+@app.route("/api/batch", methods=["POST"])
+def create_batch_job():
+    """API endpoint to download many URLs in one background job
+
+    接受 JSON（链接列表，或包含 urls 列表的对象）、表单中的 urls 文本，
+    或上传的文本文件 file（每行一个链接）。结果压缩包中包含 manifest.json。
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        data = {"urls": data}
+    elif data is None:
+        data = request.form
+
+    upload = request.files.get("file")
+    if upload is not None:
+        urls = parse_url_list(upload.read().decode("utf-8", errors="replace"))
+    elif isinstance(data.get("urls"), list):
+        urls = parse_url_list("\n".join(str(url) for url in data["urls"]))
+    else:
+        urls = parse_url_list(data.get("urls") or "")
+    cookies = data.get("cookies", "")
+    keep_logs = data.get("keep_logs") in (True, "on", "true", "1")
+    profile = data.get("profile") in (True, "on", "true", "1")
+
+    if not urls:
+        return jsonify({"error": "Missing urls"}), 400
+    if len(urls) > BATCH_MAX_URLS:
+        return jsonify({"error": f"Too many urls, at most {BATCH_MAX_URLS} per batch"}), 400
+
+    job = job_manager.submit("batch", f"{len(urls)} urls", lambda job: run_batch_job(job, urls, cookies, keep_logs, profile))
+    return jsonify({
+        "job_id": job.id,
+        "urls": len(urls),
+        "events_url": url_for("get_job_events", job_id=job.id),
+        "status_url": url_for("get_job", job_id=job.id),
+        "result_url": url_for("get_job_result", job_id=job.id),
+    }), 202
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """API endpoint to retrieve job status and progress"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def get_job_events(job_id):
+    """
+    API endpoint to stream job status and progress as server-sent events
+
+    进度变化时发送 progress 事件，任务结束时发送 end 事件后关闭连接，数据与 /api/jobs/<job_id> 相同。
+    连接最长保持 PROGRESS_STREAM_SECONDS 秒，重连时按 Last-Event-ID 只推送之后的变化；
+    同时保持的连接超过 PROGRESS_MAX_STREAMS 时返回 503，客户端应改为轮询 status_url。
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        version = int(request.headers.get("Last-Event-ID", -1))
+    except ValueError:
+        version = -1
+    if not progress_streams.acquire(blocking=False):
+        return jsonify({"error": "Too many progress streams, poll the status url instead"}), 503
+    response = Response(job_events(job, version), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # 生成器可能一次都没有执行，在响应关闭时释放
+    response.call_on_close(progress_streams.release)
+    return response
+
+
+def job_events(job, version=-1):
+    deadline = time.monotonic() + PROGRESS_STREAM_SECONDS
+    yield "retry: 2000\n\n"
+    while True:
+        timeout = min(PROGRESS_KEEPALIVE, deadline - time.monotonic())
+        if timeout <= 0:
+            return
+        current = job.progress.wait(version, timeout=timeout)
+        if current == version:
+            yield ": keep-alive\n\n"
+            continue
+        version = current
+        data = job.to_dict()
+        event = "end" if data["finished_at"] is not None else "progress"
+        yield f"event: {event}\nid: {version}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        if event == "end":
+            return
+        time.sleep(PROGRESS_INTERVAL)
+
+
+@app.route("/api/jobs/<job_id>/result", methods=["GET"])
+def get_job_result(job_id):
+    """API endpoint to download the zip of a finished job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job.status != "finished":
+        return jsonify({"error": "Job is not finished", "status": job.status}), 409
+    # 输出目录保留到任务过期，允许重复下载
+    return zip_response(job.output_dir, f"{job.title}.zip", cleanup=False, site=job.website)
+
+
 @app.route("/get-cookies")
 def get_cookies():
     return render_template("howToGetCookies.html")
@@ -110,43 +302,75 @@ def get_cookies():
 
 @app.route("/api/logs", methods=["GET"])
 def get_logs():
-    """API endpoint to retrieve logs"""
-    log_type = request.args.get('type', 'app')
+    """
+    API endpoint to retrieve logs
 
-    log_files = {
-        'zhihu': './logs/zhihu_download.log',
-        'csdn': './logs/csdn_download.log',
-        'weixin': './logs/weixin_download.log',
-        'juejin': './logs/juejin_download.log',
-    }
-
-    if log_type not in log_files:
+    - tail=N：最后 N 行（默认 LOG_TAIL_LINES），从文件末尾向前读取
+    - offset=字节偏移：从该位置向后读取，最多 LOG_MAX_READ_BYTES 字节，返回的 next_offset 用于下一次请求
+    - follow=1：以 text/event-stream 持续推送新增的行，事件 id 为下一次读取的偏移，
+      断线重连时按 Last-Event-ID 继续；未指定 offset 时先发送最后 tail 行。
+      连接最长保持 LOG_FOLLOW_SECONDS 秒，同时跟随的连接超过 LOG_MAX_FOLLOWERS 时返回 503
+    """
+    log_type = request.args.get('type', 'app')
+    if log_type not in LOG_FILES:
         return jsonify({"error": "Invalid log type"}), 400
 
-    log_path = log_files[log_type]
+    log_path = LOG_FILES[log_type]
     if not os.path.exists(log_path):
         return jsonify({"logs": f"Log file {log_path} not found"}), 404
 
     try:
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
+        tail = int(request.args.get('tail', LOG_TAIL_LINES))
+        offset = request.headers.get('Last-Event-ID') or request.args.get('offset')
+        offset = int(offset) if offset is not None else None
+    except ValueError:
+        return jsonify({"error": "tail and offset must be integers"}), 400
 
-        for encoding in encodings:
-            try:
-                with open(log_path, 'r', encoding=encoding, errors='replace') as f:
-                    lines = f.readlines()
-                    return jsonify({"logs": ''.join(lines)})
-            except UnicodeDecodeError:
-                continue
-
-        with open(log_path, 'rb') as f:
-            binary_content = f.read()
-            text_content = binary_content.decode('utf-8', errors='replace')
-            return jsonify({"logs": text_content})
-
-    except Exception as e:
+    try:
+        if offset is not None:
+            data, start, next_offset = logtail.read_from(log_path, max(offset, 0), LOG_MAX_READ_BYTES)
+        else:
+            data, start, next_offset = logtail.tail(log_path, max(tail, 0))
+    except OSError as e:
         logger.error(f"Error reading log file {log_path}: {str(e)}")
         return jsonify({"error": f"Failed to read log file: {str(e)}"}), 500
 
+    if request.args.get('follow') in ("1", "true"):
+        if not log_followers.acquire(blocking=False):
+            return jsonify({"error": "Too many log followers, retry later or read by offset"}), 503
+        response = Response(follow_logs(log_path, data, next_offset), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        # 生成器可能一次都没有执行，在响应关闭时释放
+        response.call_on_close(log_followers.release)
+        return response
+
+    return jsonify({"logs": logtail.decode(data), "offset": start, "next_offset": next_offset})
+
+
+def follow_logs(log_path, data, offset):
+    """SSE：每批新增的行作为一个事件，没有新内容时定期发送注释保持连接"""
+    def event(chunk, next_offset):
+        lines = logtail.decode(chunk).splitlines()
+        return f"id: {next_offset}\n" + "".join(f"data: {line}\n" for line in lines) + "\n"
+
+    yield "retry: 2000\n\n"
+    # 没有内容时只发送 id，浏览器重连时也能从当前位置继续
+    yield event(data, offset) if data else f"id: {offset}\n\n"
+    for chunk, next_offset in logtail.follow(log_path, offset, max_seconds=LOG_FOLLOW_SECONDS):
+        yield event(chunk, next_offset) if chunk else ": keep-alive\n\n"
+
+
+@app.route("/api/stats/ratelimit", methods=["GET"])
+def get_ratelimit_stats():
+    """API endpoint to retrieve per-host rate limiter counters"""
+    return jsonify(rate_limiter.stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus metrics: per-stage timings and per-site download counters"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 
 def cleanup_files(paths):
     """清理指定路径下的文件和目录"""
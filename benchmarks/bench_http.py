@@ -0,0 +1,112 @@
+"""
+比较每个请求新建会话（各自的连接池）与共享连接池时建立的连接数和耗时
+
+本地启动一个支持 keep-alive 的 HTTP 服务器，模拟多次下载：每次下载创建一个会话，
+请求一次页面，再用多个线程下载若干图片。服务器统计收到的 TCP 连接数。
+能找到 openssl 命令时再用自签名证书以 HTTPS 测一次，包含 TLS 握手的开销；
+本地连接没有网络往返，实际访问 CDN 时新建连接的代价还要更大。
+
+    python -m benchmarks.bench_http
+"""
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils.http import new_session
+
+BODY = b"x" * 2048
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，长连接上需要关闭 Nagle 算法，否则会等待延迟确认
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def self_signed_context(directory):
+    """用 openssl 生成自签名证书，返回服务端 SSLContext"""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                    "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def start_server(context=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    if context is not None:
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def simulate(make_session, base_url, downloads, images, image_workers):
+    """模拟 downloads 次下载，每次一个页面加 images 张图片"""
+    for i in range(downloads):
+        session = make_session()
+        session.get(f"{base_url}/p/{i}").content
+        with ThreadPoolExecutor(max_workers=image_workers) as executor:
+            list(executor.map(lambda j: session.get(f"{base_url}/img/{i}_{j}.jpg").content, range(images)))
+
+
+def run(server, scheme, downloads, images, image_workers):
+    base_url = f"{scheme}://127.0.0.1:{server.server_address[1]}"
+    for name, make_session in (("session per request", requests.Session), ("shared pool", new_session)):
+        def make_unverified_session():
+            session = make_session()
+            # 不读取 REQUESTS_CA_BUNDLE 等环境变量，否则会覆盖 verify=False
+            session.trust_env = False
+            session.verify = False
+            return session
+
+        server.connections = 0
+        start = time.perf_counter()
+        simulate(make_unverified_session, base_url, downloads, images, image_workers)
+        elapsed = time.perf_counter() - start
+        print(f"{scheme:<7}{name:<22}{server.connections:>12}{elapsed:>9.2f}")
+    server.shutdown()
+
+
+def main(downloads=50, images=20, image_workers=8):
+    print(f"{downloads} downloads x (1 page + {images} images), {image_workers} image threads")
+    print(f"{'scheme':<7}{'variant':<22}{'connections':>12}{'seconds':>9}")
+    run(start_server(), "http", downloads, images, image_workers)
+
+    if shutil.which("openssl") is None:
+        print("openssl not found, skipping https")
+        return
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+    with tempfile.TemporaryDirectory() as directory:
+        run(start_server(self_signed_context(directory)), "https", downloads, images, image_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+比较 requests（HTTP/1.1 共享连接池）与 httpx 后端（HTTP/2）下载大量小图片的吞吐量
+
+本地用自签名证书启动两个 HTTPS 服务器：线程化的 HTTP/1.1 服务器和基于 h2 的 HTTP/2 服务器。
+两者都模拟网络延迟：每个响应等待 latency 秒，新连接额外等待两个往返（TCP 和 TLS 握手）。
+图片通过 download_images 下载，与解析器的下载路径相同；限速和图片缓存在测试中关闭。
+需要 openssl 命令和 httpx[http2]。
+
+    python -m benchmarks.bench_http2
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("IMAGE_CACHE_MAX_BYTES", "0")
+
+from benchmarks.bench_http import self_signed_context
+from utils.http import new_session
+from utils.http_async import AsyncBackendSession, http2_available, httpx
+from utils.ratelimit import rate_limiter
+from utils.util import download_images
+
+BODY = b"i" * 4096
+
+
+class Http1Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.latency * 2)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http1_server(context, latency):
+    context.set_alpn_protocols(["http/1.1"])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Http1Handler)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1], server
+
+
+class Http2Protocol(asyncio.Protocol):
+    """最小的 HTTP/2 服务器：每个请求延迟 latency 秒后返回固定内容"""
+
+    def __init__(self, stats, latency):
+        import h2.config
+        import h2.connection
+        self.conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        self.stats = stats
+        self.latency = latency
+
+    def connection_made(self, transport):
+        self.stats["connections"] += 1
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+        # 握手完成前收到的请求，要等到握手结束后再开始计算延迟
+        self.ready_at = self.loop.time() + self.latency * 2
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                delay = max(self.ready_at - self.loop.time(), 0) + self.latency
+                self.loop.call_later(delay, self.respond, event.stream_id)
+        self.transport.write(self.conn.data_to_send())
+
+    def respond(self, stream_id):
+        import h2.exceptions
+        try:
+            self.conn.send_headers(stream_id, [(":status", "200"), ("content-length", str(len(BODY)))])
+            self.conn.send_data(stream_id, BODY, end_stream=True)
+        except h2.exceptions.ProtocolError:
+            return
+        self.transport.write(self.conn.data_to_send())
+
+
+def start_http2_server(context, latency):
+    context.set_alpn_protocols(["h2"])
+    loop = asyncio.new_event_loop()
+    stats = {"connections": 0}
+    server = loop.run_until_complete(loop.create_server(
+        lambda: Http2Protocol(stats, latency), "127.0.0.1", 0, ssl=context))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[1], stats
+
+
+def requests_session():
+    session = new_session("requests")
+    session.trust_env = False
+    session.verify = False
+    return session
+
+
+def httpx_session():
+    return AsyncBackendSession(transport=httpx.AsyncHTTPTransport(http2=True, verify=False))
+
+
+def measure(make_session, port, images, workers, output_dir):
+    session = make_session()
+    tasks = [(f"https://127.0.0.1:{port}/img/{i}.jpg", os.path.join(output_dir, f"{workers}_{i}.jpg"))
+             for i in range(images)]
+    start = time.perf_counter()
+    downloaded = download_images(tasks, session, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    assert downloaded == images, downloaded
+    return elapsed
+
+
+def main(images=400, latency=0.02, worker_counts=(8, 32, 64)):
+    if httpx is None or not http2_available() or shutil.which("openssl") is None:
+        print('requires openssl and httpx[http2]: pip install "httpx[http2]"')
+        sys.exit(1)
+    import warnings
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+    # 本地服务器不限速
+    rate_limiter.default_limit = (1e9, 1e9)
+
+    with tempfile.TemporaryDirectory() as directory:
+        http1_port, http1_server = start_http1_server(self_signed_context(directory), latency)
+        http2_port, http2_stats = start_http2_server(self_signed_context(directory), latency)
+        print(f"{images} images of {len(BODY)} bytes, {latency * 1000:.0f} ms latency per response")
+        print(f"{'workers':>8}{'http/1.1 s':>12}{'img/s':>8}{'conns':>7}{'http/2 s':>10}{'img/s':>8}{'conns':>7}"
+              f"{'speedup':>9}")
+        for workers in worker_counts:
+            http1_server.connections = 0
+            http2_stats["connections"] = 0
+            http1 = measure(requests_session, http1_port, images, workers, directory)
+            http2 = measure(httpx_session, http2_port, images, workers, directory)
+            print(f"{workers:>8}{http1:>12.2f}{images / http1:>8.0f}{http1_server.connections:>7}"
+                  f"{http2:>10.2f}{images / http2:>8.0f}{http2_stats['connections']:>7}{http1 / http2:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+比较 markdownify 默认转换器与 ArticleConverter 的转换耗时
+
+stock: 原先的做法，先把标题、链接、公式改写为字符串，再用 markdownify 转换并替换公式标记；
+article: 只改写图片，标题、链接、图例和公式由 ArticleConverter 直接处理。
+same input 一列在同一份 HTML 上分别运行两个转换器，只比较转换器本身。
+
+    python -m benchmarks.bench_markdown
+"""
+import tempfile
+import time
+
+from markdownify import MarkdownConverter, markdownify as md
+
+from benchmarks.bench_traversal import legacy_rewrite, site_selectors
+from benchmarks.fixtures import SITE_PAGES
+from benchmarks.legacy import replace_math_placeholders
+from utils.markdown import ArticleConverter
+from utils.registry import create_parser
+from utils.rewrite import ContentRewriter
+from utils.util import make_soup
+
+
+def prepared_html(site, markup, legacy):
+    """返回转换前的正文 HTML 和公式列表"""
+    parser = create_parser(site, "", output_dir=tempfile.gettempdir())
+    selectors = site_selectors(site)
+    soup = make_soup(markup, "lxml", selectors)
+    content_element = soup.select_one(selectors[0])
+    if legacy:
+        _, math_formulas = legacy_rewrite(parser, soup, content_element, "bench", parser.output_dir)
+    else:
+        ContentRewriter(parser, "bench", parser.output_dir).rewrite(content_element)
+        math_formulas = []
+    return content_element.decode_contents().strip(), math_formulas
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(repeat=5):
+    print(f"{'site':<8}{'stock ms':>10}{'article ms':>12}{'speedup':>9}"
+          f"{'same input: stock':>19}{'article':>9}{'speedup':>9}")
+    for site, page in SITE_PAGES.items():
+        markup = page(paragraphs=600, images=80)
+        legacy_html, math_formulas = prepared_html(site, markup, legacy=True)
+        html, _ = prepared_html(site, markup, legacy=False)
+
+        stock = best_of(lambda: replace_math_placeholders(md(legacy_html), math_formulas), repeat)
+        article = best_of(lambda: ArticleConverter().convert(html), repeat)
+        same_stock = best_of(lambda: MarkdownConverter(heading_style="atx").convert(html), repeat)
+        print(f"{site:<8}{stock * 1000:>10.1f}{article * 1000:>12.1f}{stock / article:>8.1f}x"
+              f"{same_stock * 1000:>19.1f}{article * 1000:>9.1f}{same_stock / article:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
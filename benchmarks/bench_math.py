@@ -0,0 +1,64 @@
+"""
+比较逐个 str.replace 与一次扫描替换数学公式占位符的耗时
+
+    python -m benchmarks.bench_math
+"""
+import time
+
+from benchmarks.legacy import math_placeholder, replace_math_placeholders
+
+
+def legacy_replace(content, formulas, hexo_uploader=False):
+    """原先的实现：每个公式都从头扫描一次整篇文档"""
+    for formula in [f for f, block in formulas if not block]:
+        if hexo_uploader:
+            content = content.replace("@@MATH@@", "$" + "{% raw %}" + formula + "{% endraw %}" + "$", 1)
+        elif formula.find('$') != -1:
+            content = content.replace("@@MATH@@", f"{formula}", 1)
+        else:
+            content = content.replace("@@MATH@@", f"${formula}$", 1)
+    for formula in [f for f, block in formulas if block]:
+        if hexo_uploader:
+            content = content.replace("@@MATH\\_FORMULA@@", "$$" + "{% raw %}" + formula + "{% endraw %}" + "$$", 1)
+        elif formula.find("$") != -1:
+            content = content.replace("@@MATH\\_FORMULA@@", f"{formula}", 1)
+        else:
+            content = content.replace("@@MATH\\_FORMULA@@", f"$${formula}$$", 1)
+    return content
+
+
+def build_document(count, filler=400):
+    """生成公式密集的 Markdown 文本，每 20 个公式中有一个带 \\tag 的独立公式"""
+    legacy_parts, indexed_parts, formulas = [], [], []
+    text = "这是一段用于测试的正文内容 " * (filler // 14)
+    for i in range(count):
+        block = i % 20 == 0
+        formula = f"x_{{{i}}}^2 + y_{{{i}}} = z \\tag{{{i}}}" if block else f"\\alpha_{{{i}}} + \\beta"
+        formulas.append((formula, block))
+        legacy_parts.append(text + ("@@MATH\\_FORMULA@@" if block else "@@MATH@@"))
+        indexed_parts.append(text + math_placeholder(i, block))
+    return "\n".join(legacy_parts), "\n".join(indexed_parts), formulas
+
+
+def best_of(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f"{'formulas':>9}{'doc (KB)':>10}{'legacy (ms)':>13}{'single pass (ms)':>18}{'speedup':>9}")
+    for count in (100, 1000, 3000):
+        legacy_doc, indexed_doc, formulas = build_document(count)
+        legacy_time, legacy_result = best_of(legacy_replace, legacy_doc, formulas)
+        new_time, new_result = best_of(replace_math_placeholders, indexed_doc, formulas)
+        assert legacy_result == new_result
+        print(f"{count:>9}{len(indexed_doc.encode('utf-8')) / 1024:>10.0f}"
+              f"{legacy_time * 1000:>13.1f}{new_time * 1000:>18.2f}{legacy_time / new_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
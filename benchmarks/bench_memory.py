@@ -0,0 +1,101 @@
+"""
+比较正文转换时先序列化为 HTML 再重新解析，与直接转换已解析节点的耗时和内存峰值
+
+使用约 2 MB 的知乎文章，每种方式在独立的子进程中运行，分别报告：
+转换耗时、转换阶段的 Python 内存峰值（tracemalloc，单独一次运行）、
+进程峰值 RSS（ru_maxrss）以及转换阶段使峰值 RSS 增加的部分。
+
+    python -m benchmarks.bench_memory
+"""
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from benchmarks.fixtures import zhihu_article_page
+
+ARTICLE_BYTES = 2 * 1024 * 1024
+
+
+def roundtrip(content_element):
+    from utils.markdown import ArticleConverter
+
+    return ArticleConverter().convert(content_element.decode_contents().strip()).strip()
+
+
+def direct(content_element):
+    from utils.markdown import ArticleConverter
+
+    return ArticleConverter().convert_tag(content_element).strip()
+
+
+VARIANTS = {"roundtrip": roundtrip, "direct": direct}
+
+
+def article_markup(target_bytes=ARTICLE_BYTES):
+    """生成正文部分约为 target_bytes 的知乎文章页面"""
+    paragraphs = 1000
+    while True:
+        markup = zhihu_article_page(paragraphs=paragraphs, images=paragraphs // 10, formulas=paragraphs // 4)
+        if len(markup.encode("utf-8")) >= target_bytes:
+            return markup
+        paragraphs = int(paragraphs * 1.25)
+
+
+def max_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_variant(name, trace):
+    """在子进程中执行：解析页面后转换正文，输出 JSON 格式的测量结果"""
+    from main_zhihu import ARTICLE_SELECTORS
+    from utils.util import make_soup
+
+    markup = article_markup()
+    soup = make_soup(markup, "lxml", ARTICLE_SELECTORS)
+    content_element = soup.select_one(ARTICLE_SELECTORS[0])
+    del markup
+    gc.collect()
+
+    result = {"variant": name}
+    if trace:
+        tracemalloc.start()
+        VARIANTS[name](content_element)
+        result["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    else:
+        rss_before = max_rss_mb()
+        start = time.perf_counter()
+        markdown = VARIANTS[name](content_element)
+        result["seconds"] = time.perf_counter() - start
+        result["max_rss_mb"] = max_rss_mb()
+        result["rss_growth_mb"] = result["max_rss_mb"] - rss_before
+        result["markdown_bytes"] = len(markdown.encode("utf-8"))
+    print(json.dumps(result))
+
+
+def measure(name, trace):
+    output = subprocess.run([sys.executable, "-m", "benchmarks.bench_memory", name] + (["--trace"] if trace else []),
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'variant':<12}{'seconds':>9}{'traced peak MB':>16}{'max RSS MB':>12}{'RSS growth MB':>15}")
+    for name in VARIANTS:
+        result = measure(name, trace=False)
+        result.update(measure(name, trace=True))
+        print(f"{name:<12}{result['seconds']:>9.2f}{result['traced_peak_mb']:>16.1f}"
+              f"{result['max_rss_mb']:>12.1f}{result['rss_growth_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_variant(sys.argv[1], "--trace" in sys.argv)
+    else:
+        main()
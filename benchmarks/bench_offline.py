@@ -0,0 +1,180 @@
+"""
+离线端到端基准：各站点 judge_type 的吞吐量、分阶段延迟和进程峰值 RSS
+
+主进程启动 MockServer 回放录制的（或按 fixtures 生成的）响应，每个站点在独立的子进程中运行，
+解析器的会话通过 RewriteAdapter 访问 MockServer。每篇文章像 Web 请求一样使用独立的输出目录，
+下载完成后流式打包为 ZIP。报告：
+
+- articles/s、images/s：子进程内的总吞吐量
+- 各阶段 p50/p95（毫秒）：fetch（请求页面）、parse（构建 soup）、transform（改写正文）、
+  image（单张图片下载）、markdownify（转换 Markdown）、write（写文件）、zip（打包输出目录）、
+  total（一次 judge_type）
+- peak RSS：子进程的 ru_maxrss
+
+限速、图片缓存和页面缓存在测试中关闭。zhihu-column 为一个知乎专栏（专栏页、条目接口和各篇文章）。
+
+    python -m benchmarks.bench_offline [--articles 20] [--sites zhihu,csdn] [--column-items 50]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("IMAGE_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("PAGE_CACHE_ENABLED", "0")
+os.environ["HTTP_BACKEND"] = "requests"
+
+from benchmarks.mock_server import MockServer, SyntheticSites, mount_mock
+
+STAGES = ("fetch", "parse", "transform", "image", "markdownify", "write", "zip", "total")
+
+SITE_URLS = {
+    "zhihu": "https://zhuanlan.zhihu.com/p/{i}",
+    "csdn": "https://blog.csdn.net/bench/article/details/{i}",
+    "weixin": "https://mp.weixin.qq.com/s/bench{i}",
+    "juejin": "https://juejin.cn/post/{i}",
+    "zhihu-column": "https://www.zhihu.com/column/c_bench",
+}
+
+
+def percentile(samples, fraction):
+    """最近秩百分位数"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+class StageTimer:
+    """
+    替换各阶段的函数，记录每次调用的耗时（秒）
+    """
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    def wrap(self, stage, fn):
+        samples = self.samples[stage]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+
+        return timed
+
+    def install(self):
+        import utils.base_parser as base_parser
+        import utils.util as util
+        from utils.markdown import ArticleConverter
+        from utils.rewrite import ContentRewriter
+
+        base_parser.make_soup = self.wrap("parse", base_parser.make_soup)
+        util.download_image = self.wrap("image", util.download_image)
+        ContentRewriter.rewrite = self.wrap("transform", ContentRewriter.rewrite)
+        ArticleConverter.convert_tag = self.wrap("markdownify", ArticleConverter.convert_tag)
+        base_parser.BaseParser.write_markdown = self.wrap("write", base_parser.BaseParser.write_markdown)
+
+    def instrument(self, parser):
+        parser.fetch = self.wrap("fetch", parser.fetch)
+
+
+def run_site(site, base_url, articles):
+    """在子进程中运行：依次下载各篇文章并打包，返回测量结果"""
+    from utils.ratelimit import rate_limiter
+    from utils.registry import create_parser
+    from utils.zipstream import stream_zip_from_directory
+
+    rate_limiter.host_limits = {}
+    rate_limiter.default_limit = (1e9, 1e9)
+    timer = StageTimer()
+    timer.install()
+
+    website = "zhihu" if site == "zhihu-column" else site
+    urls = [SITE_URLS[site]] if site == "zhihu-column" else [SITE_URLS[site].format(i=i) for i in range(articles)]
+    zip_bytes = 0
+    start = time.perf_counter()
+    for url in urls:
+        output_dir = tempfile.mkdtemp(prefix=f"bench_{website}_")
+        parser = create_parser(website, "", output_dir=output_dir)
+        mount_mock(parser.session, base_url)
+        timer.instrument(parser)
+        timer.wrap("total", parser.judge_type)(url)
+
+        zip_start = time.perf_counter()
+        for chunk in stream_zip_from_directory(output_dir, cleanup=True):
+            zip_bytes += len(chunk)
+        timer.samples["zip"].append(time.perf_counter() - zip_start)
+    elapsed = time.perf_counter() - start
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    article_count = len(timer.samples["markdownify"])
+    return {
+        "site": site,
+        "seconds": elapsed,
+        "articles": article_count,
+        "images": len(timer.samples["image"]),
+        "zip_mb": zip_bytes / (1024 * 1024),
+        "peak_rss_mb": rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024,
+        "stages": {stage: [percentile(samples, 0.5), percentile(samples, 0.95)]
+                   for stage, samples in timer.samples.items()},
+    }
+
+
+def measure(site, base_url, articles):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_offline", "--run", site, "--base-url", base_url,
+         "--articles", str(articles)],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def ms(value):
+    return f"{value * 1000:.1f}" if value is not None else "-"
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="离线端到端基准")
+    arg_parser.add_argument("--sites", default=",".join(SITE_URLS), help="逗号分隔的站点")
+    arg_parser.add_argument("--articles", type=int, default=20, help="每个站点下载的文章数")
+    arg_parser.add_argument("--column-items", type=int, default=50, help="知乎专栏的条目数")
+    arg_parser.add_argument("--paragraphs", type=int, default=200)
+    arg_parser.add_argument("--images", type=int, default=30, help="每篇文章的图片数")
+    arg_parser.add_argument("--run", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.run:
+        print(json.dumps(run_site(args.run, args.base_url, args.articles)))
+        return
+
+    server = MockServer(synthetic=SyntheticSites(paragraphs=args.paragraphs, images=args.images,
+                                                 column_items=args.column_items)).start()
+    print(f"mock server {server.base_url}, {len(server.recordings)} recorded responses, "
+          f"synthetic pages: {args.paragraphs} paragraphs, {args.images} images")
+
+    results = [measure(site, server.base_url, args.articles) for site in args.sites.split(",")]
+    server.shutdown()
+
+    print(f"\n{'site':<14}{'articles':>9}{'images':>8}{'seconds':>9}{'articles/s':>12}{'images/s':>10}"
+          f"{'zip MB':>8}{'peak RSS MB':>13}")
+    for result in results:
+        print(f"{result['site']:<14}{result['articles']:>9}{result['images']:>8}{result['seconds']:>9.2f}"
+              f"{result['articles'] / result['seconds']:>12.1f}{result['images'] / result['seconds']:>10.0f}"
+              f"{result['zip_mb']:>8.1f}{result['peak_rss_mb']:>13.1f}")
+
+    print(f"\n{'p50 / p95 ms':<14}" + "".join(f"{stage:>16}" for stage in STAGES))
+    for result in results:
+        cells = "".join(f"{ms(p50) + ' / ' + ms(p95):>16}" for p50, p95 in
+                        (result["stages"][stage] for stage in STAGES))
+        print(f"{result['site']:<14}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+比较各站点文章页面在不同 HTML 解析方式下的耗时和内存峰值
+
+    python -m benchmarks.bench_parse
+"""
+import time
+import tracemalloc
+
+from benchmarks.fixtures import SITE_PAGES
+from main_csdn import ARTICLE_SELECTORS as CSDN_SELECTORS
+from main_juejin import ARTICLE_SELECTORS as JUEJIN_SELECTORS
+from main_weixin import ARTICLE_SELECTORS as WEIXIN_SELECTORS
+from main_zhihu import ARTICLE_SELECTORS as ZHIHU_SELECTORS
+from utils.util import make_soup
+
+SITE_SELECTORS = {
+    "zhihu": ZHIHU_SELECTORS,
+    "csdn": CSDN_SELECTORS,
+    "weixin": WEIXIN_SELECTORS,
+    "juejin": JUEJIN_SELECTORS,
+}
+
+VARIANTS = [
+    ("html.parser", False),
+    ("html.parser", True),
+    ("lxml", False),
+    ("lxml", True),
+]
+
+
+def measure(markup, parser, selectors, repeat=5):
+    """返回 (最短耗时秒数, 内存峰值字节数)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(markup, parser, selectors)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    soup = make_soup(markup, parser, selectors)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del soup
+    return best, peak
+
+
+def main():
+    print(f"{'site':<8}{'parser':<13}{'strainer':<10}{'time (ms)':>11}{'peak (MB)':>11}{'speedup':>9}")
+    for site, build_page in SITE_PAGES.items():
+        markup = build_page().encode("utf-8")
+        baseline = None
+        for parser, strained in VARIANTS:
+            selectors = SITE_SELECTORS[site] if strained else None
+            elapsed, peak = measure(markup, parser, selectors)
+            baseline = baseline or elapsed
+            print(f"{site:<8}{parser:<13}{'yes' if strained else 'no':<10}"
+                  f"{elapsed * 1000:>11.1f}{peak / 1024 / 1024:>11.1f}{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+比较 Web 应用的启动耗时和每个请求构建解析器的耗时
+
+启动耗时在新进程中测量：只导入 app（解析器按需加载），以及导入 app 后再导入全部解析器模块
+（即原先在 app.py 顶部导入四个解析器的做法）。
+构建耗时比较原先每个请求构建全部四个解析器再从中选取一个，与通过插件注册表只构建一个。
+
+    python -m benchmarks.bench_startup
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_VARIANTS = [
+    ("eager (app + all parsers)", "import app, main_zhihu, main_csdn, main_weixin, main_juejin"),
+    ("lazy (import app)", "import app"),
+]
+
+
+def import_time(statement, repeat=7):
+    """返回在新进程中执行 statement 的耗时中位数（毫秒），不含解释器本身的启动时间"""
+    code = ("import time; start = time.perf_counter(); "
+            f"{statement}; print(time.perf_counter() - start)")
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]) * 1000)
+    return statistics.median(samples)
+
+
+def eager_create(output_dir):
+    from main_zhihu import ZhihuParser
+    from main_csdn import CsdnParser
+    from main_weixin import WeixinParser
+    from main_juejin import JuejinParser
+
+    parser_map = {
+        "csdn": CsdnParser(output_dir=output_dir),
+        "zhihu": ZhihuParser("", output_dir=output_dir),
+        "weixin": WeixinParser(output_dir=output_dir),
+        "juejin": JuejinParser(output_dir=output_dir),
+    }
+    return parser_map["csdn"]
+
+
+def lazy_create(output_dir):
+    from utils.registry import create_parser
+
+    return create_parser("csdn", "", output_dir=output_dir)
+
+
+def main():
+    print(f"{'import':<28}{'ms':>10}{'speedup':>10}")
+    baseline = None
+    for name, statement in IMPORT_VARIANTS:
+        elapsed = import_time(statement)
+        baseline = baseline or elapsed
+        print(f"{name:<28}{elapsed:>10.1f}{baseline / elapsed:>9.1f}x")
+
+    sys.path.insert(0, ROOT)
+    output_dir = tempfile.mkdtemp()
+    # 预热，排除首次导入的耗时
+    eager_create(output_dir)
+    lazy_create(output_dir)
+
+    print(f"\n{'construct per request':<28}{'us':>10}{'speedup':>10}")
+    number = 2000
+    results = [
+        ("eager (all four parsers)", min(timeit.repeat(lambda: eager_create(output_dir), number=number, repeat=5))),
+        ("lazy (registry, one)", min(timeit.repeat(lambda: lazy_create(output_dir), number=number, repeat=5))),
+    ]
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:<28}{elapsed / number * 1e6:>10.1f}{baseline / elapsed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+比较正文从改写到生成 Markdown 的完整耗时：原先的逐类 find_all 多次遍历，与现在的单次遍历
+
+legacy: 样式、图片、标题、图例、链接、公式各遍历一次，再用 markdownify 转换并替换公式占位符；
+single: ContentRewriter 一次遍历只改写图片，标题、链接、图例和公式由 ArticleConverter 在转换时处理。
+两者都从同一份新解析的页面开始，不包括页面解析和图片下载，并检查得到的图片任务一致。
+
+    python -m benchmarks.bench_traversal
+"""
+import gc
+import importlib
+import os
+import tempfile
+import time
+from urllib.parse import unquote, urlparse, parse_qs
+
+from benchmarks.fixtures import SITE_PAGES
+from markdownify import markdownify as md
+
+from benchmarks.legacy import insert_new_line, math_placeholder, replace_math_placeholders
+from utils.registry import SITE_PLUGINS, create_parser
+from utils.markdown import ArticleConverter
+from utils.rewrite import ContentRewriter
+from utils.util import make_soup
+
+
+def legacy_rewrite(parser, soup, content_element, markdown_title, output_dir):
+    """原先的实现：样式、懒加载图片、标题、图片、图例、链接、公式各遍历一次"""
+    for style_tag in content_element.find_all("style"):
+        style_tag.decompose()
+
+    if parser.site == "zhihu":
+        for img_lazy in content_element.find_all("img", class_=lambda x: 'lazy' in x if x else True):
+            img_lazy.decompose()
+
+    for header in content_element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+        markdown_header = f"{'#' * int(header.name[1])} {header.get_text(strip=True)}"
+        insert_new_line(soup, header, 1)
+        header.replace_with(markdown_header)
+
+    image_tasks = []
+    for img in content_element.find_all("img"):
+        target = parser.image_target(img, markdown_title, len(image_tasks))
+        if target is None:
+            continue
+        img_url, img_path = target
+        img["src"] = img_path
+        image_tasks.append((img_url, os.path.join(output_dir, img_path)))
+        insert_new_line(soup, img, 1)
+
+    for figcaption in content_element.find_all("figcaption"):
+        insert_new_line(soup, figcaption, 2)
+
+    for link in content_element.find_all("a"):
+        if 'href' in link.attrs:
+            original_url = link.attrs['href']
+            query_params = parse_qs(urlparse(original_url).query)
+            article_url = unquote(query_params.get('target', [original_url])[0])
+            article_title = link.attrs.get('data-text', article_url)
+            link.replace_with(f"[{article_title}]({article_url})")
+
+    math_formulas = []
+    for math_span in content_element.select("span.ztext-math"):
+        latex_formula = math_span['data-tex']
+        block = latex_formula.find("\\tag") != -1
+        if block:
+            insert_new_line(soup, math_span, 1)
+        math_span.replace_with(math_placeholder(len(math_formulas), block))
+        math_formulas.append((latex_formula, block))
+    return image_tasks, math_formulas
+
+
+def legacy_convert(parser, soup, content_element, markdown_title, output_dir):
+    """原先的完整流程：多次遍历改写后用 markdownify 转换，再替换公式占位符"""
+    image_tasks, math_formulas = legacy_rewrite(parser, soup, content_element, markdown_title, output_dir)
+    replace_math_placeholders(md(content_element.decode_contents().strip()), math_formulas)
+    return image_tasks
+
+
+def single_pass_convert(parser, soup, content_element, markdown_title, output_dir):
+    """现在的完整流程，与 BaseParser.save_and_transform 相同"""
+    image_tasks = ContentRewriter(parser, markdown_title, output_dir).rewrite(content_element)
+    ArticleConverter().convert_tag(content_element)
+    return image_tasks
+
+
+def site_selectors(site):
+    return importlib.import_module(SITE_PLUGINS[site].module).ARTICLE_SELECTORS
+
+
+def measure(site, markup, rewrite, repeat):
+    """返回 (最短耗时秒数, 图片任务)"""
+    parser = create_parser(site, "", output_dir=tempfile.gettempdir())
+    selectors = site_selectors(site)
+    soups = [make_soup(markup, "lxml", selectors) for _ in range(repeat)]
+    best = float("inf")
+    # 内存中同时保留多份页面，关闭垃圾回收以免回收停顿计入耗时
+    gc.collect()
+    gc.disable()
+    try:
+        for soup in soups:
+            content_element = soup.select_one(selectors[0])
+            start = time.perf_counter()
+            image_tasks = rewrite(parser, soup, content_element, "bench", parser.output_dir)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best, image_tasks
+
+
+def main(repeat=15):
+    print(f"{'site':<8}{'nodes':>8}{'legacy ms':>12}{'single ms':>12}{'speedup':>10}")
+    for site, page in SITE_PAGES.items():
+        markup = page(paragraphs=600, images=80)
+        legacy = measure(site, markup, legacy_convert, repeat)
+        single = measure(site, markup, single_pass_convert, repeat)
+        assert legacy[1] == single[1], site
+        selectors = site_selectors(site)
+        nodes = len(make_soup(markup, "lxml", selectors).select_one(selectors[0]).find_all(True))
+        print(f"{site:<8}{nodes:>8}{legacy[0] * 1000:>12.2f}{single[0] * 1000:>12.2f}"
+              f"{legacy[0] / single[0]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+基准测试使用的页面样本
+
+按各站点真实页面的结构生成：页面外壳（导航、侧边栏、脚本）占大部分体积，
+正文包含标题、段落、图片、图例、链接和数学公式。
+"""
+import json
+import random
+
+
+def _paragraphs(count, formulas, rng):
+    parts = []
+    for i in range(count):
+        text = " ".join(rng.choice(["知乎", "Markdown", "转换", "公式", "图片", "data", "model", "loss"])
+                        for _ in range(40))
+        if i < formulas:
+            parts.append(
+                f'<p>{text} <span class="ztext-math" data-eeimg="1" data-tex="\\alpha_{i}+\\beta^{{{i}}}">'
+                f'\\alpha_{i}+\\beta^{{{i}}}</span> {text}</p>')
+        else:
+            parts.append(f"<p>{text}</p>")
+        if i % 15 == 0:
+            parts.append(f"<h2>Section {i}</h2>")
+        if i % 10 == 5:
+            parts.append(f'<p><a href="https://link.zhihu.com/?target=https%3A//example.com/{i}" '
+                         f'class=" external" data-text="ref {i}">ref {i}</a></p>')
+    return parts
+
+
+def _figures(count, url_template):
+    return [
+        f'<figure data-size="normal"><img src="{url_template.format(i=i)}" data-rawwidth="1280" '
+        f'class="origin_image zh-lightbox-thumb"/><figcaption>Figure {i}</figcaption></figure>'
+        for i in range(count)
+    ]
+
+
+def _interleave(paragraphs, figures):
+    step = max(1, len(paragraphs) // max(1, len(figures)))
+    body = []
+    for i, paragraph in enumerate(paragraphs):
+        body.append(paragraph)
+        if i % step == 0 and figures:
+            body.append(figures.pop(0))
+    return "\n".join(body + figures)
+
+
+def _chrome(nav_links=300, scripts=20):
+    nav = "".join(f'<li class="Nav-item"><a href="/topic/{i}" class="Nav-link">Topic {i}</a></li>'
+                  for i in range(nav_links))
+    sidebar = "".join(f'<div class="Card"><div class="Card-header">Card {i}</div>'
+                      f'<div class="Card-body"><span>{i}</span><span>item</span></div></div>'
+                      for i in range(nav_links // 2))
+    script_blocks = "".join(f'<script type="text/javascript">var config{i} = {{"a": {i}, "b": "x"}};</script>'
+                            for i in range(scripts))
+    return f'<header><ul class="Nav">{nav}</ul></header>', f'<aside>{sidebar}</aside>', script_blocks
+
+
+def zhihu_article_page(paragraphs=200, images=30, formulas=60, seed=0):
+    rng = random.Random(seed)
+    header, sidebar, scripts = _chrome()
+    body = _interleave(_paragraphs(paragraphs, formulas, rng),
+                       _figures(images, "https://pic{i}.zhimg.com/v2-{i:032x}_1440w.jpg?source=172ae18b"))
+    initial_data = json.dumps({"initialState": {"entities": {"users": {
+        str(i): {"name": f"user{i}", "headline": "x" * 80} for i in range(2000)}}}})
+    return f"""<!doctype html><html><head><title>Benchmark Article - 知乎</title></head><body>
+{header}
+<main><article class="Post-Main">
+<h1 class="Post-Title">Benchmark Article</h1>
+<div class="AuthorInfo"><meta itemprop="name" content="bench"/><span class="UserLink">bench</span></div>
+<div class="Post-RichTextContainer"><div class="RichText ztext Post-RichText">{body}</div></div>
+<div class="ContentItem-time">发布于 2024-05-01 12:00</div>
+</article></main>
+{sidebar}
+<script id="js-initialData" type="text/json">{initial_data}</script>
+{scripts}
+</body></html>"""
+
+
+def csdn_article_page(paragraphs=200, images=30, seed=0):
+    rng = random.Random(seed)
+    header, sidebar, scripts = _chrome()
+    body = _interleave(_paragraphs(paragraphs, 0, rng),
+                       _figures(images, "https://img-blog.csdnimg.cn/{i:032x}.png"))
+    return f"""<!doctype html><html><head><title>Benchmark Article_CSDN博客</title></head><body>
+{header}
+<div class="blog-content-box">
+<h1 class="title-article" id="articleContentId">Benchmark Article</h1>
+<div class="bar-content"><a class="follow-nickName" href="https://blog.csdn.net/bench">bench</a>
+<span class="time">于&nbsp;2024-05-01 12:00:00&nbsp;发布</span></div>
+<div id="content_views" class="markdown_views prism-atom-one-dark">{body}</div>
+</div>
+{sidebar}
+{scripts}
+</body></html>"""
+
+
+def weixin_article_page(paragraphs=200, images=30, seed=0):
+    rng = random.Random(seed)
+    header, sidebar, scripts = _chrome(nav_links=60)
+    figures = [f'<p><img data-src="https://mmbiz.qpic.cn/mmbiz_png/{i:032x}/640?wx_fmt=png" '
+               f'class="rich_pages wxw-img" data-ratio="0.5"/></p>' for i in range(images)]
+    body = _interleave(_paragraphs(paragraphs, 0, rng), figures)
+    return f"""<!doctype html><html><head><title>Benchmark Article</title></head><body>
+{header}
+<div id="page-content" class="rich_media_area_primary">
+<h1 class="rich_media_title" id="activity-name">Benchmark Article</h1>
+<div id="meta_content" class="rich_media_meta_list"><a id="js_name" href="javascript:void(0);">bench</a></div>
+<div class="rich_media_content js_underline_content" id="js_content">{body}</div>
+</div>
+{sidebar}
+<script type="text/javascript">var createTime = '2024-05-01 12:00';</script>
+{scripts}
+</body></html>"""
+
+
+def juejin_article_page(paragraphs=200, images=30, seed=0):
+    rng = random.Random(seed)
+    header, sidebar, scripts = _chrome()
+    body = _interleave(_paragraphs(paragraphs, 0, rng),
+                       _figures(images, "https://p3-juejin.byteimg.com/tos-cn-i-k3u1fbpfcp/{i:032x}~tplv-k3u1fbpfcp-jj-mark.image"))
+    return f"""<!doctype html><html><head><title>Benchmark Article - 掘金</title></head><body>
+{header}
+<div class="article-area">
+<h1 class="article-title">Benchmark Article</h1>
+<div class="author-info-block"><span class="name">bench</span><time class="time">2024-05-01</time></div>
+<div class="main"><div class="markdown-body">{body}</div></div>
+</div>
+{sidebar}
+{scripts}
+</body></html>"""
+
+
+# 站点名称 -> 生成文章页面的函数
+SITE_PAGES = {
+    "zhihu": zhihu_article_page,
+    "csdn": csdn_article_page,
+    "weixin": weixin_article_page,
+    "juejin": juejin_article_page,
+}
@@ -0,0 +1,44 @@
+"""
+已被 ArticleConverter 取代的转换方式，仅作为基准测试中的对照
+
+旧流程在 soup 中插入 <br> 换行，把公式替换为占位符，交给 markdownify 转换后再把占位符换回公式。
+"""
+import re
+
+from utils.util import format_math
+
+# 数学公式占位符，带序号以便一次扫描即可全部替换
+MATH_PLACEHOLDER_PATTERN = re.compile(r"@@MATH(BLOCK)?(\d+)@@")
+
+
+def insert_new_line(soup, element, num_breaks):
+    """
+    在指定位置插入换行符
+    """
+    for _ in range(num_breaks):
+        new_line = soup.new_tag('br')
+        element.insert_after(new_line)
+
+
+def math_placeholder(index, block=False):
+    """
+    生成第 index 个公式的占位符，block 表示带 \\tag 的独立公式
+    """
+    return f"@@MATHBLOCK{index}@@" if block else f"@@MATH{index}@@"
+
+
+def replace_math_placeholders(content, formulas, hexo_uploader=False):
+    """
+    一次扫描将所有占位符替换为公式，formulas 为按序号排列的 (公式, 是否为独立公式) 列表
+    """
+    if not formulas:
+        return content
+
+    def replace(match):
+        index = int(match.group(2))
+        if index >= len(formulas):
+            return match.group(0)
+        formula, block = formulas[index]
+        return format_math(formula, block, hexo_uploader)
+
+    return MATH_PLACEHOLDER_PATTERN.sub(replace, content)
@@ -0,0 +1,202 @@
+"""
+离线回放站点响应的本地 HTTP 服务器
+
+解析器的会话挂载 RewriteAdapter 后，https://<主机>/<路径> 的请求改写为
+http://127.0.0.1:<端口>/https/<主机>/<路径>，由 MockServer 按原始链接查找响应：
+先查 benchmarks/recordings 下用 benchmarks.record 录制的响应，找不到时按站点的链接规则
+用 fixtures 中的页面生成（文章页、知乎专栏页和专栏条目接口、各图床的图片）。
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from requests.adapters import HTTPAdapter
+
+from benchmarks.fixtures import SITE_PAGES
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+INDEX_FILE = "index.json"
+
+# 1x1 PNG，加上填充使大小接近常见的小图片
+IMAGE_BODY = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082") + b"\0" * 8192
+
+IMAGE_HOSTS = re.compile(r"(zhimg\.com|csdnimg\.cn|qpic\.cn|byteimg\.com)$")
+
+# 各站点文章链接 -> 文章 ID
+ARTICLE_PATTERNS = {
+    "zhihu": re.compile(r"^zhuanlan\.zhihu\.com/p/(\w+)$"),
+    "csdn": re.compile(r"^blog\.csdn\.net/[^/]+/article/details/(\w+)$"),
+    "weixin": re.compile(r"^mp\.weixin\.qq\.com/s/([\w-]+)$"),
+    "juejin": re.compile(r"^juejin\.cn/post/(\w+)$"),
+}
+COLUMN_PAGE = re.compile(r"^www\.zhihu\.com/column/([\w-]+)$")
+COLUMN_ITEMS = re.compile(r"^www\.zhihu\.com/api/v4/columns/([\w-]+)/items$")
+
+
+def recording_key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+
+class Recordings:
+    """
+    录制的响应：index.json 记录 链接 -> {file, status, content_type}，响应体按主机分目录保存
+    """
+
+    def __init__(self, root=RECORDINGS_DIR):
+        self.root = root
+        self.lock = threading.Lock()
+        self.index = {}
+        index_path = os.path.join(root, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def __len__(self):
+        return len(self.index)
+
+    def lookup(self, url):
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.root, entry["file"]), "rb") as f:
+            return entry["status"], entry["content_type"], f.read()
+
+    def save(self, url, status, content_type, body):
+        host = urlsplit(url).netloc or "unknown"
+        file = os.path.join(host, recording_key(url))
+        os.makedirs(os.path.join(self.root, host), exist_ok=True)
+        with open(os.path.join(self.root, file), "wb") as f:
+            f.write(body)
+        with self.lock:
+            self.index[url] = {"file": file, "status": status, "content_type": content_type}
+            with open(os.path.join(self.root, INDEX_FILE), "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+class SyntheticSites:
+    """
+    按链接规则生成的响应，页面结构与各站点相同
+
+    同一站点的文章共用一份生成的页面，只替换标题，使每篇文章的输出文件不同。
+    """
+
+    def __init__(self, paragraphs=200, images=30, column_items=50):
+        self.paragraphs = paragraphs
+        self.images = images
+        self.column_items = column_items
+        self.pages = {}
+        self.lock = threading.Lock()
+
+    def article(self, site, article_id):
+        with self.lock:
+            if site not in self.pages:
+                self.pages[site] = SITE_PAGES[site](paragraphs=self.paragraphs, images=self.images)
+        return self.pages[site].replace("Benchmark Article", f"Benchmark Article {article_id}")
+
+    def column_page(self, column_id):
+        return (f"<!doctype html><html><head><title>Bench Column {column_id} - 知乎</title></head><body>"
+                f"<div class=\"ColumnHome\">Bench Column · {self.column_items} 篇内容</div></body></html>")
+
+    def column_items_page(self, column_id, offset, limit):
+        items = [{"id": 90000 + i, "type": "article", "title": f"Item {i}",
+                  "created": 1714500000 - i * 3600, "updated": 1714500000 - i * 3600}
+                 for i in range(offset, min(offset + limit, self.column_items))]
+        return {"data": items, "paging": {"is_end": offset + limit >= self.column_items,
+                                          "totals": self.column_items}}
+
+    def lookup(self, url):
+        parsed = urlsplit(url)
+        host_path = parsed.netloc + parsed.path.rstrip("/")
+        if IMAGE_HOSTS.search(parsed.netloc):
+            return 200, "image/png", IMAGE_BODY
+        for site, pattern in ARTICLE_PATTERNS.items():
+            match = pattern.match(host_path)
+            if match:
+                return 200, "text/html; charset=utf-8", self.article(site, match.group(1)).encode("utf-8")
+        match = COLUMN_PAGE.match(host_path)
+        if match:
+            return 200, "text/html; charset=utf-8", self.column_page(match.group(1)).encode("utf-8")
+        match = COLUMN_ITEMS.match(host_path)
+        if match:
+            query = parse_qs(parsed.query)
+            data = self.column_items_page(match.group(1), int(query.get("offset", ["0"])[0]),
+                                          int(query.get("limit", ["10"])[0]))
+            return 200, "application/json", json.dumps(data).encode("utf-8")
+        return None
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # /https/<主机>/<路径>?<查询> -> https://<主机>/<路径>?<查询>
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        url = f"{scheme}://{rest}"
+        response = self.server.recordings.lookup(url) or self.server.synthetic.lookup(url)
+        if response is None:
+            status, content_type, body = 404, "text/plain", b"not recorded"
+        else:
+            status, content_type, body = response
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, recordings=None, synthetic=None):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.recordings = recordings if recordings is not None else Recordings()
+        self.synthetic = synthetic or SyntheticSites()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class RewriteAdapter(HTTPAdapter):
+    """
+    把请求改写到本地 MockServer，挂载到解析器的会话上即可离线运行
+    """
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        parsed = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parsed.scheme}/{parsed.netloc}{parsed.path}"
+        if parsed.query:
+            request.url += f"?{parsed.query}"
+        return super().send(request, **kwargs)
+
+
+def mount_mock(session, base_url):
+    adapter = RewriteAdapter(base_url, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,59 @@
+"""
+录制真实站点的响应，供 bench_offline 离线回放
+
+对每个链接调用对应解析器的 judge_type，会话挂载 RecordingAdapter，
+页面、知乎专栏条目接口和图片的响应都保存到 benchmarks/recordings。
+
+    python -m benchmarks.record --cookies "<知乎 Cookies>" https://zhuanlan.zhihu.com/p/123 ...
+"""
+import argparse
+import tempfile
+
+from requests.adapters import HTTPAdapter
+
+from benchmarks.mock_server import Recordings
+from utils.registry import create_parser, detect_site
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    正常发送请求，并把成功的响应保存下来
+    """
+
+    def __init__(self, recordings, **kwargs):
+        super().__init__(**kwargs)
+        self.recordings = recordings
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if request.method == "GET" and response.status_code == 200:
+            self.recordings.save(request.url, response.status_code,
+                                 response.headers.get("Content-Type", "application/octet-stream"),
+                                 response.content)
+        return response
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="录制站点响应")
+    arg_parser.add_argument("urls", nargs="+")
+    arg_parser.add_argument("--cookies", default="", help="知乎 Cookies")
+    args = arg_parser.parse_args(argv)
+
+    recordings = Recordings()
+    adapter = RecordingAdapter(recordings, pool_maxsize=32)
+    for url in args.urls:
+        site = detect_site(url)
+        if site is None:
+            print(f"unsupported: {url}")
+            continue
+        with tempfile.TemporaryDirectory() as output_dir:
+            parser = create_parser(site, args.cookies, output_dir=output_dir)
+            parser.session.mount("https://", adapter)
+            parser.session.mount("http://", adapter)
+            title = parser.judge_type(url)
+        print(f"{site}: {url} -> {title}")
+    print(f"{len(recordings)} responses in {recordings.root}")
+
+
+if __name__ == "__main__":
+    main()
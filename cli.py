@@ -0,0 +1,108 @@
+"""
+命令行批量下载
+
+    python cli.py https://zhuanlan.zhihu.com/p/123 https://blog.csdn.net/xxx/article/details/456
+    python cli.py -i links.txt -o downloads --zip downloads.zip --cookies-file cookies.txt
+
+链接所属的站点按主机名自动识别，输出目录中按站点分子目录保存，并写入 manifest.json。
+"""
+import argparse
+import os
+import sys
+import threading
+
+from utils.batch import BatchDownloader, MANIFEST_FILE, parse_url_list, parse_site_limits
+from utils.zipstream import stream_zip_from_directory
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(description="批量下载知乎、CSDN、微信公众号、掘金文章为 Markdown")
+    arg_parser.add_argument("urls", nargs="*", help="要下载的链接")
+    arg_parser.add_argument("-i", "--input", action="append", default=[],
+                            help="链接列表文件，每行一个链接，- 表示标准输入；可以重复指定")
+    arg_parser.add_argument("-o", "--output-dir", default="downloads", help="输出目录（默认 downloads）")
+    arg_parser.add_argument("--zip", dest="zip_path", help="同时把输出目录打包为该 ZIP 文件")
+    arg_parser.add_argument("--cookies", default="", help="知乎 Cookies")
+    arg_parser.add_argument("--cookies-file", help="从文件读取知乎 Cookies")
+    arg_parser.add_argument("-j", "--workers", type=int, default=8, help="同时处理的链接数（默认 8）")
+    arg_parser.add_argument("--site-limits", default=os.environ.get("BATCH_SITE_LIMITS"),
+                            help="各站点同时处理的链接数，例如 zhihu=2,csdn=4")
+    arg_parser.add_argument("--keep-logs", action="store_true", help="在 logs 目录中保留各站点的日志")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="在分析器下处理每个链接，结果（.prof、.folded、.txt）保存在输出目录的 profiles 子目录中")
+    return arg_parser
+
+
+def read_urls(args):
+    lines = list(args.urls)
+    for path in args.input:
+        if path == "-":
+            lines.extend(sys.stdin.read().splitlines())
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                lines.extend(f.read().splitlines())
+    return parse_url_list("\n".join(lines))
+
+
+def report_progress(progress, stop, stream=sys.stderr):
+    """
+    在终端的同一行上刷新批量下载的进度，直到 stop 被设置
+    """
+    version = -1
+    while not stop.is_set():
+        version = progress.wait(version, timeout=1)
+        snapshot = progress.snapshot()
+        done = snapshot["success"] + snapshot["failed"]
+        eta = f"  ETA {snapshot['eta']:.0f}s" if snapshot["eta"] else ""
+        stream.write(f"\r[{done}/{snapshot['total']}] failed: {snapshot['failed']}  "
+                     f"{snapshot['bytes'] / (1024 * 1024):.1f} MB{eta}\033[K")
+        stream.flush()
+        stop.wait(0.5)
+    stream.write("\n")
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    urls = read_urls(args)
+    if not urls:
+        print("没有需要下载的链接", file=sys.stderr)
+        return 2
+
+    cookies = args.cookies
+    if args.cookies_file:
+        with open(args.cookies_file, "r", encoding="utf-8") as f:
+            cookies = f.read().strip()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    downloader = BatchDownloader(args.output_dir, cookies=cookies, keep_logs=args.keep_logs,
+                                 max_workers=args.workers, site_limits=parse_site_limits(args.site_limits),
+                                 profile=args.profile)
+    stop = threading.Event()
+    reporter = None
+    if sys.stderr.isatty():
+        reporter = threading.Thread(target=report_progress, args=(downloader.progress, stop), daemon=True)
+        reporter.start()
+    try:
+        results = downloader.run(urls)
+    finally:
+        stop.set()
+        if reporter is not None:
+            reporter.join()
+
+    for result in results:
+        detail = result["path"] if result["status"] == "ok" else result["error"]
+        print(f"[{result['status']:>11}] {result['url']}  {detail or ''}")
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(downloader.summary().items()))
+    print(f"{len(results)} urls ({summary}), manifest: {os.path.join(args.output_dir, MANIFEST_FILE)}")
+
+    if args.zip_path:
+        with open(args.zip_path, "wb") as f:
+            for chunk in stream_zip_from_directory(args.output_dir):
+                f.write(chunk)
+        print(f"zip: {args.zip_path}")
+
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,77 +1,81 @@
 import os
-import re
-import urllib.parse
-import logging
-import requests
-from bs4 import BeautifulSoup
-from markdownify import markdownify as md
-from urllib.parse import unquote, urlparse, parse_qs
-from tqdm import tqdm
+from urllib.parse import urlparse
 import json
-from utils.util import insert_new_line, get_article_date, download_image, download_video, get_valid_filename
-
-
-class ZhihuParser:
-    def __init__(self, cookies, hexo_uploader=False, keep_logs=False):
-        self.hexo_uploader = hexo_uploader
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from utils.util import get_article_date, download_video, get_valid_filename
+from utils.ratelimit import rate_limiter
+from utils.base_parser import BaseParser
+from utils.state import DONE
+from utils.metrics import BYTES_DOWNLOADED
+from utils.profiling import profile_initializer
+
+
+# 各类页面实际用到的节点，解析时只构建这些节点，第一个为正文
+ARTICLE_SELECTORS = ["div.Post-RichTextContainer", "h1.Post-Title", "div.ContentItem-time", "div.AuthorInfo"]
+ANSWER_SELECTORS = ["div.RichContent-inner", "h1.QuestionHeader-title", "div.ContentItem-time", "div.AuthorInfo"]
+ZVIDEO_SELECTORS = ["div.ZVideo-video", "div.ZVideo-meta", "script#js-initialData"]
+
+
+def column_item_time(item):
+    """
+    专栏条目的更新时间（秒），没有更新时间时使用创建时间
+    """
+    for key in ("updated", "updated_time", "created", "created_time"):
+        if item.get(key):
+            return int(item[key])
+    return None
+
+
+def synced_before(item, watermark):
+    """
+    条目在上次同步时就已存在，并且之后没有更新
+    """
+    updated = column_item_time(item)
+    return updated is not None and updated <= watermark
+
+
+class ZhihuParser(BaseParser):
+    site = "zhihu"
+
+    def __init__(self, cookies, hexo_uploader=False, keep_logs=False, image_workers=8,
+                 column_workers=4, max_per_host=4, prefetch_pages=2, output_dir=".", html_parser=None,
+                 incremental=True):
+        super().__init__(hexo_uploader=hexo_uploader, keep_logs=keep_logs, image_workers=image_workers,
+                         output_dir=output_dir, html_parser=html_parser)
+        # 专栏并发下载：worker 数量、单个主机的最大并发请求数、预取的分页数量
+        self.column_workers = column_workers
+        self.max_per_host = max_per_host
+        self.prefetch_pages = prefetch_pages
+        # 增量同步：翻到上次同步之前的条目后停止翻页
+        self.incremental = incremental
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
         self.cookies = cookies
-        self.session = requests.Session()
-        self.keep_logs = keep_logs
-        self.user_agents = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-        self.headers = {
-            'User-Agent': self.user_agents,
-            'Accept-Language': 'en,zh-CN;q=0.9,zh;q=0.8',
-            'Cookie': self.cookies
-        }
+        self.headers['Cookie'] = self.cookies
         self.session.headers.update(self.headers)
-        self.soup = None
-        self.logger = logging.getLogger('zhihu_parser')
-        
-        if self.keep_logs:
-            self.logger.setLevel(logging.INFO)
-            if not self.logger.handlers and not os.path.exists('./logs'):
-                os.makedirs('./logs', exist_ok=True)
-            
-            if not self.logger.handlers:
-                handler = logging.FileHandler(
-                    './logs/zhihu_download.log', encoding='utf-8')
-                formatter = logging.Formatter(
-                    '%(asctime)s - %(levelname)s - %(message)s')
-                handler.setFormatter(formatter)
-                self.logger.addHandler(handler)
-        else:
-            self.logger.setLevel(logging.CRITICAL + 1)
-
-    def log(self, level, message):
-        """自定义日志函数，只在keep_logs为True时记录"""
-        if self.keep_logs:
-            if level == 'info':
-                self.logger.info(message)
-            elif level == 'warning':
-                self.logger.warning(message)
-            elif level == 'error':
-                self.logger.error(message)
-
-    def check_connect_error(self, target_link):
+
+    def host_slot(self, url):
         """
-        检查是否连接错误
+        获取限制单个主机并发请求数的信号量
         """
-        try:
-            response = self.session.get(target_link)
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as err:
-            self.log('error', f"HTTP error occurred: {err}")
-            raise
-        except requests.exceptions.RequestException as err:
-            self.log('error', f"Error occurred: {err}")
-            raise
-
-        self.soup = BeautifulSoup(response.content, "html.parser")
-        if self.soup.text.find("有问题，就会有答案打开知乎App在「我的页」右上角打开扫一扫其他扫码方式") != -1:
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def fetch(self, target_link, headers):
+        with self.host_slot(target_link):
+            return rate_limiter.request(self.session, target_link, headers=headers)
+
+    def validate_page(self, soup):
+        if soup.text.find("有问题，就会有答案打开知乎App在「我的页」右上角打开扫一扫其他扫码方式") != -1:
             self.log('warning', "Cookies are required to access the article.")
             raise ValueError("Cookies are required to access the article.")
 
-        if self.soup.text.find("你似乎来到了没有知识存在的荒原") != -1:
+        if soup.text.find("你似乎来到了没有知识存在的荒原") != -1:
             self.log('warning', "The page does not exist.")
             raise ValueError("The page does not exist.")
 
@@ -99,181 +103,28 @@ class ZhihuParser:
             # Re-raise to allow the caller to decide what to do
             raise
 
-    def save_and_transform(self, title_element, content_element, author, target_link, date=None):
+    def skip_image(self, img):
         """
-        转化并保存为 Markdown 格式文件
+        懒加载的占位图片不下载
         """
-        # 获取标题和内容
-        if title_element is not None:
-            title = title_element.text.strip()
-        else:
-            title = "Untitled"
-
-        # 防止文件名称太长，加载不出图像
-        # markdown_title = get_valid_filename(title[-20:-1])
-        # 如果觉得文件名太怪不好管理，那就使用全名
-        markdown_title = get_valid_filename(title)
-
-        if date:
-            markdown_title = f"({date}){markdown_title}_{author}"
-        else:
-            markdown_title = f"{markdown_title}_{author}"
-
-        if content_element is not None:
-            # 将 css 样式移除
-            for style_tag in content_element.find_all("style"):
-                style_tag.decompose()
-
-            for img_lazy in content_element.find_all("img", class_=lambda x: 'lazy' in x if x else True):
-                img_lazy.decompose()
-
-            # 处理内容中的标题
-            for header in content_element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                header_level = int(header.name[1])  # 从标签名中获取标题级别（例如，'h2' -> 2）
-                header_text = header.get_text(strip=True)  # 提取标题文本
-                # 转换为 Markdown 格式的标题
-                markdown_header = f"{'#' * header_level} {header_text}"
-                insert_new_line(self.soup, header, 1)
-                header.replace_with(markdown_header)
-
-            # 处理回答中的图片
-            for img in content_element.find_all("img"):
-                try:
-                    if 'src' in img.attrs:
-                        img_url = img.attrs['src']
-                    else:
-                        continue
-
-                    img_name = urllib.parse.quote(os.path.basename(img_url))
-                    img_path = f"{markdown_title}/{img_name}"
+        classes = img.get("class")
+        return not classes or any('lazy' in c for c in classes)
 
-                    extensions = ['.jpg', '.png', '.gif']  # 可以在此列表中添加更多的图片格式
-
-                    # 如果图片链接中图片后缀后面还有字符串则直接截停
-                    for ext in extensions:
-                        index = img_path.find(ext)
-                        if index != -1:
-                            img_path = img_path[:index + len(ext)]
-                            break  # 找到第一个匹配的格式后就跳出循环
-
-                    img["src"] = img_path
-
-                    # 下载图片并保存到本地
-                    os.makedirs(os.path.dirname(img_path), exist_ok=True)
-                    download_image(img_url, img_path, self.session)
-
-                    # 在图片后插入换行符
-                    insert_new_line(self.soup, img, 1)
-                except Exception as e:
-                    self.log('warning', f"Error downloading image {img.get('src', 'unknown')}: {str(e)}")
-                    # 继续处理下一张图片，不中断进程
-
-            # 在图例后面加上换行符
-            for figcaption in content_element.find_all("figcaption"):
-                insert_new_line(self.soup, figcaption, 2)
-
-            # 处理链接
-            for link in content_element.find_all("a"):
-                if 'href' in link.attrs:
-                    original_url = link.attrs['href']
-
-                    # 解析并解码 URL
-                    parsed_url = urlparse(original_url)
-                    query_params = parse_qs(parsed_url.query)
-                    target_url = query_params.get('target', [original_url])[
-                        0]  # 使用原 URL 作为默认值
-                    article_url = unquote(target_url)  # 解码 URL
-
-                    # 如果没有 data-text 属性，则使用文章链接作为标题
-                    if 'data-text' not in link.attrs:
-                        article_title = article_url
-                    else:
-                        article_title = link.attrs['data-text']
-
-                    markdown_link = f"[{article_title}]({article_url})"
-
-                    link.replace_with(markdown_link)
-
-            # 提取并存储数学公式
-            math_formulas = []
-            math_tags = []
-            for math_span in content_element.select("span.ztext-math"):
-                latex_formula = math_span['data-tex']
-                # math_formulas.append(latex_formula)
-                # math_span.replace_with("@@MATH@@")
-                # 使用特殊标记标记位置
-                if latex_formula.find("\\tag") != -1:
-                    math_tags.append(latex_formula)
-                    insert_new_line(self.soup, math_span, 1)
-                    math_span.replace_with("@@MATH_FORMULA@@")
-                else:
-                    math_formulas.append(latex_formula)
-                    math_span.replace_with("@@MATH@@")
-
-            # 获取文本内容
-            content = content_element.decode_contents().strip()
-            # 转换为 markdown
-            content = md(content)
-
-            # 将特殊标记替换为 LaTeX 数学公式
-            for formula in math_formulas:
-                if self.hexo_uploader:
-                    content = content.replace(
-                        "@@MATH@@", "$" + "{% raw %}" + formula + "{% endraw %}" + "$", 1)
-                else:
-                    # 如果公式中包含 $ 则不再添加 $ 符号
-                    if formula.find('$') != -1:
-                        content = content.replace("@@MATH@@", f"{formula}", 1)
-                    else:
-                        content = content.replace(
-                            "@@MATH@@", f"${formula}$", 1)
-
-            for formula in math_tags:
-                if self.hexo_uploader:
-                    content = content.replace(
-                        "@@MATH\_FORMULA@@",
-                        "$$" + "{% raw %}" + formula + "{% endraw %}" + "$$",
-                        1,
-                    )
-                else:
-                    # 如果公式中包含 $ 则不再添加 $ 符号
-                    if formula.find("$") != -1:
-                        content = content.replace(
-                            "@@MATH\_FORMULA@@", f"{formula}", 1)
-                    else:
-                        content = content.replace(
-                            "@@MATH\_FORMULA@@", f"$${formula}$$", 1)
-
-        else:
-            content = ""
-
-        # 转化为 Markdown 格式
-        if content:
-            markdown = f"# {title}\n\n **Author:** [{author}]\n\n **Link:** [{target_link}]\n\n{content}"
-        else:
-            markdown = f"# {title}\n\n Content is empty."
-
-        # 保存 Markdown 文件
-        with open(f"{markdown_title}.md", "w", encoding="utf-8") as f:
-            f.write(markdown)
-
-        return markdown_title
-
-    def parse_zhihu_zvideo(self, target_link):
+    def parse_zhihu_zvideo(self, target_link, output_dir=None):
         """
         解析知乎视频并保存为 Markdown 格式文件
         """
         try:
-            self.check_connect_error(target_link)
-            data = json.loads(self.soup.select_one(
+            soup = self.check_connect_error(target_link, selectors=ZVIDEO_SELECTORS)
+            data = json.loads(soup.select_one(
                 "div.ZVideo-video")['data-zop'])  # 获取视频数据
 
-            date = get_article_date(self.soup, "div.ZVideo-meta")
+            date = get_article_date(soup, "div.ZVideo-meta")
 
             markdown_title = f"({date}){data['authorName']}_{data['title']}/{data['authorName']}_{data['title']}.mp4"
 
             video_url = None
-            script = self.soup.find('script', id='js-initialData')
+            script = soup.find('script', id='js-initialData')
             if script:
                 data = json.loads(script.text)
                 try:
@@ -289,9 +140,12 @@ class ZhihuParser:
                 self.log('error', "No suitable script tag found for video data")
                 return None
 
-            os.makedirs(os.path.dirname(markdown_title), exist_ok=True)
+            if output_dir is None:
+                output_dir = self.output_dir
+            video_path = os.path.join(output_dir, markdown_title)
+            os.makedirs(os.path.dirname(video_path), exist_ok=True)
 
-            download_video(video_url, markdown_title, self.session)
+            download_video(video_url, video_path, self.session, site=self.site, on_bytes=self.progress.add_bytes)
 
             self.log('info', f"Successfully parsed video: {markdown_title}")
 
@@ -300,21 +154,24 @@ class ZhihuParser:
             self.log('error', f"Error parsing zvideo {target_link}: {str(e)}")
             raise
 
-    def parse_zhihu_article(self, target_link):
+    def parse_zhihu_article(self, target_link, output_dir=None):
         """
         解析知乎文章并保存为Markdown格式文件
         """
         try:
-            self.check_connect_error(target_link)
-            title_element = self.soup.select_one("h1.Post-Title")
-            content_element = self.soup.select_one(
+            soup, cached_title = self.fetch_article(target_link, output_dir, ARTICLE_SELECTORS)
+            if soup is None:
+                return cached_title
+
+            title_element = soup.select_one("h1.Post-Title")
+            content_element = soup.select_one(
                 "div.Post-RichTextContainer")
-            date = get_article_date(self.soup, "div.ContentItem-time")
-            author = self.soup.select_one('div.AuthorInfo').find(
+            date = get_article_date(soup, "div.ContentItem-time")
+            author = soup.select_one('div.AuthorInfo').find(
                 'meta', {'itemprop': 'name'}).get('content')
 
             markdown_title = self.save_and_transform(
-                title_element, content_element, author, target_link, date)
+                title_element, content_element, author, target_link, date, output_dir=output_dir)
             
             self.log('info', f"Successfully parsed article: {markdown_title}")
 
@@ -323,22 +180,25 @@ class ZhihuParser:
             self.log('error', f"Error parsing article {target_link}: {str(e)}")
             raise
 
-    def parse_zhihu_answer(self, target_link):
+    def parse_zhihu_answer(self, target_link, output_dir=None):
         """
         解析知乎回答并保存为 Markdown 格式文件
         """
         try:
-            self.check_connect_error(target_link)
+            soup, cached_title = self.fetch_article(target_link, output_dir, ANSWER_SELECTORS)
+            if soup is None:
+                return cached_title
+
             # 找到回答标题、内容、作者所在的元素
-            title_element = self.soup.select_one("h1.QuestionHeader-title")
-            content_element = self.soup.select_one("div.RichContent-inner")
-            date = get_article_date(self.soup, "div.ContentItem-time")
-            author = self.soup.select_one('div.AuthorInfo').find(
+            title_element = soup.select_one("h1.QuestionHeader-title")
+            content_element = soup.select_one("div.RichContent-inner")
+            date = get_article_date(soup, "div.ContentItem-time")
+            author = soup.select_one('div.AuthorInfo').find(
                 'meta', {'itemprop': 'name'}).get('content')
 
             # 解析知乎文章并保存为Markdown格式文件
             markdown_title = self.save_and_transform(
-                title_element, content_element, author, target_link, date)
+                title_element, content_element, author, target_link, date, output_dir=output_dir)
 
             self.log('info', f"Successfully parsed answer: {markdown_title}")
 
@@ -347,35 +207,121 @@ class ZhihuParser:
             self.log('error', f"Error parsing answer {target_link}: {str(e)}")
             raise
 
-    def load_processed_articles(self, filename):
+    def prefetch_column_items(self, column_id, watermark=None, paging=None):
         """
-        从文件加载已处理文章的ID。
+        在后台线程中提前翻页请求专栏条目接口，逐条返回条目。
+
+        给出 watermark 时，翻到整页条目都不晚于 watermark 的页面后停止翻页。
+        翻页正常结束且没有跳过任何页面时，paging["complete"] 为 True。
         """
-        if not os.path.exists(filename):
-            return set()
-        with open(filename, 'r', encoding='utf-8') as file:
-            return set(file.read().splitlines())
+        if paging is None:
+            paging = {}
+        paging["complete"] = False
+        items_queue = queue.Queue(maxsize=self.prefetch_pages)
+        stop_event = threading.Event()
+        end_of_pages = object()
+
+        # 性能分析时预取线程也加入采样
+        join_profile = profile_initializer()
+
+        def producer():
+            join_profile()
+            offset = 0
+            consecutive_failures = 0
+            skipped_pages = 0
+            try:
+                while not stop_event.is_set():
+                    api_url = f"https://www.zhihu.com/api/v4/columns/{column_id}/items?limit=10&offset={offset}"
+                    try:
+                        with self.host_slot(api_url):
+                            response = rate_limiter.request(self.session, api_url)
+                        data = response.json()
+                        BYTES_DOWNLOADED.inc(len(response.content), site=self.site, kind="api")
+                        self.progress.add_bytes(len(response.content))
+                        consecutive_failures = 0
+                    except Exception as e:
+                        self.log('error', f"Error fetching column data: {str(e)}")
+                        # 尝试继续下一页，连续失败过多则放弃
+                        consecutive_failures += 1
+                        skipped_pages += 1
+                        offset += 10
+                        if consecutive_failures > 10:
+                            self.log('error', "Too many failures fetching column data, giving up")
+                            break
+                        continue
 
-    def save_processed_article(self, filename, article_id):
+                    page = data.get("data", [])
+                    items_queue.put(page)
+                    if data["paging"]["is_end"] or (
+                            watermark is not None and page
+                            and all(synced_before(item, watermark) for item in page)):
+                        paging["complete"] = skipped_pages == 0
+                        break
+                    offset += 10
+            except Exception as e:
+                self.log('error', f"Error fetching column data: {str(e)}")
+            finally:
+                items_queue.put(end_of_pages)
+
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        try:
+            while True:
+                page = items_queue.get()
+                if page is end_of_pages:
+                    break
+                for item in page:
+                    yield item
+        finally:
+            # 消费方提前退出时通知预取线程停止，并清空队列避免其阻塞
+            stop_event.set()
+            while thread.is_alive():
+                try:
+                    items_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def column_item_url(self, item):
+        """
+        专栏条目的页面链接，未知类型返回 None
+        """
+        item_id = str(item["id"])
+        if item["type"] == "zvideo":
+            return f"https://www.zhihu.com/zvideo/{item_id}"
+        elif item["type"] == "article":
+            return f"https://zhuanlan.zhihu.com/p/{item_id}"
+        elif item["type"] == "answer":
+            return f"https://www.zhihu.com/question/{item['question']['id']}/answer/{item_id}"
+        return None
+
+    def parse_column_item(self, item, output_dir):
         """
-        将处理过的文章ID保存到文件。
+        解析专栏中的单个条目（包含 type 和 url），返回 markdown_title，未知类型返回 False
         """
-        with open(filename, 'a', encoding='utf-8') as file:
-            file.write(article_id + '\n')
+        parse = {
+            "zvideo": self.parse_zhihu_zvideo,
+            "article": self.parse_zhihu_article,
+            "answer": self.parse_zhihu_answer,
+        }.get(item["type"])
+        if parse is None:
+            self.log('warning', f"Unknown item type: {item['type']}")
+            return False
+        return parse(item["url"], output_dir)
 
     def parse_zhihu_column(self, target_link):
         """
         解析知乎专栏并保存为 Markdown 格式文件
         """
+        folder_name = None
         try:
-            self.check_connect_error(target_link)
+            soup = self.check_connect_error(target_link)
 
             # 将所有文章放在一个以专栏标题命名的文件夹中
-            title = self.soup.text.split('-')[0].strip()
+            title = soup.text.split('-')[0].strip()
 
             # 尝试获取总文章数
             try:
-                total_articles = int(self.soup.text.split(
+                total_articles = int(soup.text.split(
                     '篇内容')[0].split('·')[-1].strip())
             except (ValueError, IndexError):
                 # 如果无法解析总文章数，使用-1表示未知
@@ -383,108 +329,98 @@ class ZhihuParser:
                 self.log('warning', "Could not determine total article count, using undefined count")
 
             folder_name = get_valid_filename(title)
-            os.makedirs(folder_name, exist_ok=True)
-            os.chdir(folder_name)
+            column_dir = os.path.join(self.output_dir, folder_name)
+            os.makedirs(column_dir, exist_ok=True)
 
-            processed_filename = "zhihu_processed_articles.txt"
-            processed_articles = self.load_processed_articles(
-                processed_filename)
-            failed_articles_filename = "zhihu_failed_articles.txt"
+            column_id = target_link.rstrip('/').split('/')[-1]
+            state = self.open_column_state(column_dir, column_id)
+            # 已处理条目上次下载时的更新时间
+            processed_articles = state.source_versions(DONE)
 
-            # 读取失败的文章列表，用于记录
-            failed_articles = set()
-            if os.path.exists(failed_articles_filename):
-                with open(failed_articles_filename, 'r', encoding='utf-8') as file:
-                    failed_articles = set(file.read().splitlines())
-
-            # 获取所有文章链接
-            offset = 0
             success_count = 0
             failure_count = 0
 
-            # 计算已处理的文章数
+            # 进度从已处理的文章数开始，总数未知时为 -1
             already_processed = len(processed_articles)
+            self.progress.start(total=total_articles, already_processed=already_processed)
 
-            # 初始化进度条
-            progress_desc = "解析文章"
-            if total_articles > 0:
-                progress_bar = tqdm(
-                    total=total_articles, initial=already_processed, desc=progress_desc)
-            else:
-                # 如果无法确定总数，就使用一个无限进度条
-                progress_bar = tqdm(desc=progress_desc)
-
-            while True:
+            def record_result(future, item):
+                nonlocal success_count, failure_count
+                item_id = str(item["id"])
                 try:
-                    api_url = f"/api/v4/columns/{target_link.split('/')[-1]}/items?limit=10&offset={offset}"
-                    response = self.session.get(
-                        f"https://www.zhihu.com{api_url}")
-                    data = response.json()
-
-                    for item in data["data"]:
-                        item_id = str(item["id"])
-                        item_link = None
-
-                        # 如果已经处理过，跳过
-                        if item_id in processed_articles:
+                    markdown_title = future.result()
+                    if markdown_title is False:
+                        return
+                except Exception as e:
+                    failure_count += 1
+                    self.progress.fail()
+                    # 记录失败的文章，下次运行时重试
+                    state.mark_failed(item_id, item["type"], str(e), url=item["url"])
+                    self.log('error', f"Error processing {item['type']} {item_id}: {str(e)}")
+                    return
+
+                # 成功处理，记录并更新进度
+                self.record_item_output(state, item_id, item["type"], column_dir, markdown_title,
+                                        url=item["url"], source_updated=item["updated"])
+                processed_articles[item_id] = item["updated"]
+                success_count += 1
+                self.progress.done()
+
+            # 增量同步时翻到上次同步的时间点为止
+            watermark = state.get_meta("watermark") if self.incremental else None
+            watermark = int(watermark) if watermark is not None else None
+            paging = {}
+            newest = watermark or 0
+            seen = set()
+
+            # 预取线程负责翻页，线程池并发解析文章，同时处理中的条目数有上限
+            max_in_flight = self.column_workers * 2
+            with ThreadPoolExecutor(max_workers=self.column_workers, initializer=profile_initializer()) as executor:
+                pending = {}
+
+                def submit(item):
+                    self.progress.discover()
+                    pending[executor.submit(self.parse_column_item, item, column_dir)] = item
+                    if len(pending) >= max_in_flight:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            record_result(future, pending.pop(future))
+
+                for item in self.prefetch_column_items(column_id, watermark, paging):
+                    item_id = str(item["id"])
+                    updated = column_item_time(item)
+                    seen.add(item_id)
+                    if updated is not None:
+                        newest = max(newest, updated)
+
+                    # 如果已经处理过且之后没有更新，跳过；之前失败过的会再试一次
+                    if item_id in processed_articles:
+                        known = processed_articles[item_id]
+                        if known is None:
+                            # 从旧版本记录导入的条目没有更新时间，记下当前的
+                            state.set_source_updated(item_id, updated)
+                        if known is None or updated is None or updated <= known:
                             continue
 
-                        # 如果之前失败过，再试一次
-                        retry_failed = item_id in failed_articles
-
-                        try:
-                            if item["type"] == "zvideo":
-                                item_link = f"https://www.zhihu.com/zvideo/{item_id}"
-                                self.parse_zhihu_zvideo(item_link)
-                            elif item["type"] == "article":
-                                item_link = f"https://zhuanlan.zhihu.com/p/{item_id}"
-                                self.parse_zhihu_article(item_link)
-                            elif item["type"] == "answer":
-                                item_link = f"https://www.zhihu.com/question/{item['question']['id']}/answer/{item_id}"
-                                self.parse_zhihu_answer(item_link)
-                            else:
-                                self.log('warning', f"Unknown item type: {item['type']}")
-                                continue
-
-                            # 成功处理，记录并更新进度
-                            self.save_processed_article(
-                                processed_filename, item_id)
-                            if retry_failed:
-                                failed_articles.remove(item_id)
-                                # 更新失败文件
-                                with open(failed_articles_filename, 'w', encoding='utf-8') as file:
-                                    file.write('\n'.join(failed_articles))
-                            success_count += 1
-                            progress_bar.update(1)
-
-                        except Exception as e:
-                            failure_count += 1
-                            # 记录失败的文章
-                            failed_articles.add(item_id)
-                            with open(failed_articles_filename, 'a', encoding='utf-8') as file:
-                                file.write(f"{item_id}\n")
-                            self.log('error', f"Error processing {item['type']} {item_id}: {str(e)}")
-                            # 继续处理下一篇文章
-
-                    if data["paging"]["is_end"]:
-                        break
+                    url = self.column_item_url(item)
+                    # 先登记为 pending，中断后下次运行可以按记录的链接继续
+                    state.add_items([(item_id, item["type"], url)])
+                    submit({"id": item_id, "type": item["type"], "url": url, "updated": updated})
 
-                    offset += 10
-                except Exception as e:
-                    self.log('error', f"Error fetching column data: {str(e)}")
-                    # 尝试继续下一页
-                    offset += 10
-                    # 如果连续多次失败，可以考虑中断
-                    if offset > 100:  # 例如，如果失败超过10页，就放弃
-                        self.log('error', "Too many failures fetching column data, giving up")
-                        break
+                # 提前停止翻页时，之前失败或中断、这次没有翻到的条目按记录的链接重试
+                for item_id, item_type, url, _, _ in state.remaining():
+                    if item_id not in seen and url:
+                        submit({"id": item_id, "type": item_type, "url": url,
+                                "updated": None})
 
-            progress_bar.close()  # 完成后关闭进度条
+                for future in list(pending):
+                    future.exception()
+                    record_result(future, pending.pop(future))
 
-            # 保留失败文件，以便下次重试
-            # 如果失败文件为空，则删除
-            if len(failed_articles) == 0 and os.path.exists(failed_articles_filename):
-                os.remove(failed_articles_filename)
+            # 完整翻页后才推进同步时间点，否则下次可能漏掉跳过的页面
+            if paging["complete"] and newest:
+                state.set_meta("watermark", newest)
+            state.close()
 
             self.log('info', f"Column processing complete. Success: {success_count}, Failed: {failure_count}")
 
@@ -492,8 +428,8 @@ class ZhihuParser:
             return folder_name
         except Exception as e:
             self.log('error', f"Error parsing column {target_link}: {str(e)}")
-            # 在这种情况下，返回当前文件夹名，以便打包已下载的内容
-            return os.path.basename(os.getcwd())
+            # 在这种情况下，返回专栏文件夹名，以便打包已下载的内容
+            return folder_name or os.path.basename(os.path.abspath(self.output_dir))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,297 @@
+import os
+import re
+import logging
+import threading
+import urllib.parse
+import requests
+from utils.util import download_images, get_valid_filename, make_soup, HTML_PARSER
+from utils.markdown import ArticleConverter
+from utils.rewrite import ContentRewriter
+from utils.ratelimit import rate_limiter
+from utils.cache import page_cache, page_key, replace_file
+from utils.http import new_session
+from utils.metrics import span, ARTICLES_SAVED, BYTES_DOWNLOADED, CACHE_HITS, CACHE_MISSES
+from utils.state import STATE_DIR, StateStore, file_sha256
+from utils.logtail import rotating_handler
+from utils.progress import Progress
+
+# 多个解析器同时创建时只添加一次日志处理器
+_handler_lock = threading.Lock()
+
+
+class BaseParser:
+    """
+    各站点解析器的公共部分：会话与请求头、日志、页面请求与缓存、专栏下载状态
+
+    子类设置 site（用于日志名称和日志文件），并实现 judge_type；
+    图片的链接和保存路径因站点而异，由 image_target 决定。
+    """
+
+    site = None
+    user_agents = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+    def __init__(self, hexo_uploader=False, keep_logs=False, image_workers=8, output_dir=".", html_parser=None):
+        self.hexo_uploader = hexo_uploader
+        # 所有输出文件都写入该目录，不依赖当前工作目录
+        self.output_dir = output_dir
+        # HTML 解析器，"lxml" 比默认的 "html.parser" 快得多
+        self.html_parser = html_parser or HTML_PARSER
+        self.image_workers = image_workers
+        # 会话各自保存 Cookies，底层连接池在进程内共享
+        self.session = new_session()
+        self.keep_logs = keep_logs
+        self.headers = {
+            'User-Agent': self.user_agents,
+            'Accept-Language': 'en,zh-CN;q=0.9,zh;q=0.8',
+        }
+        self.session.headers.update(self.headers)
+        self.soup = None
+        # 专栏下载进度和下载的字节数，后台任务把它替换为任务自己的进度，供查询和推送
+        self.progress = Progress()
+        self.logger = logging.getLogger(f'{self.site}_parser')
+
+        # logger 在进程内共享，级别只在添加处理器时设置一次；是否记录由 log() 按 keep_logs 决定，
+        # 不保留日志的解析器不能降低级别，否则会关闭同时运行的其他任务的日志
+        if self.keep_logs and not self.logger.handlers:
+            with _handler_lock:
+                if not self.logger.handlers:
+                    os.makedirs('./logs', exist_ok=True)
+                    self.logger.setLevel(logging.INFO)
+                    # 按大小轮转，避免日志文件无限增长
+                    self.logger.addHandler(rotating_handler(f'./logs/{self.site}_download.log'))
+
+    def log(self, level, message):
+        """自定义日志函数，只在keep_logs为True时记录"""
+        if self.keep_logs:
+            if level == 'info':
+                self.logger.info(message)
+            elif level == 'warning':
+                self.logger.warning(message)
+            elif level == 'error':
+                self.logger.error(message)
+
+    def fetch(self, target_link, headers):
+        """
+        通过限速层请求页面，子类可以在此加入额外的并发控制
+        """
+        return rate_limiter.request(self.session, target_link, headers=headers)
+
+    def validate_page(self, soup):
+        """
+        检查页面内容是否可用，不可用时抛出 ValueError
+        """
+
+    def request_page(self, target_link, headers=None):
+        """
+        请求页面，HTTP 错误时抛出异常
+        """
+        try:
+            with span("fetch", self.site):
+                response = self.fetch(target_link, headers or {})
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            self.log('error', f"HTTP error occurred: {err}")
+            raise
+        except requests.exceptions.RequestException as err:
+            self.log('error', f"Error occurred: {err}")
+            raise
+        return response
+
+    def parse_page(self, content, selectors=None):
+        """
+        解析并检查页面，selectors 为页面中需要用到的节点，只构建这些节点以减少解析开销
+        """
+        with span("parse", self.site):
+            soup = make_soup(content, self.html_parser, selectors)
+        self.validate_page(soup)
+
+        # 专栏并发下载时各线程使用返回值，self.soup 仅保留最近一次的页面
+        self.soup = soup
+        return soup
+
+    def check_connect_error(self, target_link, selectors=None):
+        """
+        检查是否连接错误，返回解析后的页面
+        """
+        response = self.request_page(target_link)
+        BYTES_DOWNLOADED.inc(len(response.content), site=self.site, kind="page")
+        self.progress.add_bytes(len(response.content))
+        return self.parse_page(response.content, selectors)
+
+    def page_key(self, target_link):
+        # 用户提供的 Cookies 在请求头中，不同账号的页面分开缓存
+        return page_key(target_link, self.session.headers.get("Cookie"))
+
+    def fetch_article(self, target_link, output_dir=None, selectors=None):
+        """
+        通过页面缓存发送条件请求，返回 (解析后的页面, None)
+
+        页面未修改且有上次生成的文件时，把文件恢复到 output_dir，返回 (None, Markdown 标题)；
+        缓存在条件请求之后被淘汰时，重新请求完整页面。
+        """
+        if output_dir is None:
+            output_dir = self.output_dir
+        key = self.page_key(target_link)
+        response = self.request_page(target_link, page_cache.conditional_headers(key))
+        counter = CACHE_HITS if response.status_code == 304 else CACHE_MISSES
+        counter.inc(site=self.site, cache="page")
+
+        content = None
+        if response.status_code == 304:
+            markdown_title = page_cache.restore_output(key, output_dir)
+            if markdown_title is not None:
+                self.log('info', f"Page not modified, reused cached markdown: {markdown_title}")
+                return None, markdown_title
+            content = page_cache.cached_body(key)
+            if content is None:
+                self.log('info', f"Cached page evicted, fetching again: {target_link}")
+                response = self.request_page(target_link)
+        if content is None:
+            content = response.content
+            BYTES_DOWNLOADED.inc(len(content), site=self.site, kind="page")
+            self.progress.add_bytes(len(content))
+            page_cache.update(key, response)
+        return self.parse_page(content, selectors), None
+
+    def judge_type(self, target_link):
+        """
+        判断url类型并下载，返回 Markdown 标题
+        """
+        raise NotImplementedError
+
+    def skip_image(self, img):
+        """
+        返回 True 时直接移除该图片，不下载
+        """
+        return False
+
+    def image_target(self, img, markdown_title, index):
+        """
+        返回图片的 (下载链接, 相对保存路径)，没有可用链接时返回 None
+
+        index 为该图片在正文中的序号（只计入需要下载的图片）
+        """
+        if 'src' in img.attrs:
+            img_url = img.attrs['src']
+        else:
+            return None
+
+        img_name = urllib.parse.quote(os.path.basename(img_url))
+        img_path = f"{markdown_title}/{img_name}"
+
+        extensions = ['.jpg', '.png', '.gif']  # 可以在此列表中添加更多的图片格式
+
+        # 如果图片链接中图片后缀后面还有字符串则直接截停
+        for ext in extensions:
+            position = img_path.find(ext)
+            if position != -1:
+                img_path = img_path[:position + len(ext)]
+                break  # 找到第一个匹配的格式后就跳出循环
+
+        return img_url, img_path
+
+    def save_and_transform(self, title_element, content_element, author, target_link, date=None, output_dir=None):
+        """
+        转化并保存为 Markdown 格式文件
+        """
+        if output_dir is None:
+            output_dir = self.output_dir
+
+        # 获取标题和内容
+        if title_element is not None:
+            title = title_element.text.strip()
+        else:
+            title = "Untitled"
+
+        # 防止文件名称太长，加载不出图像
+        # markdown_title = get_valid_filename(title[-20:-1])
+        # 如果觉得文件名太怪不好管理，那就使用全名
+        markdown_title = get_valid_filename(title)
+
+        if date:
+            markdown_title = f"({date}){markdown_title}_{author}"
+        else:
+            markdown_title = f"{markdown_title}_{author}"
+
+        failed_images = []
+        if content_element is not None:
+            # 一次遍历将图片改为本地路径
+            with span("rewrite", self.site):
+                image_tasks = ContentRewriter(self, markdown_title, output_dir).rewrite(content_element)
+
+            # 并发下载所有图片，单张失败只记录日志
+            def on_image_error(url, path, e):
+                failed_images.append(url)
+                self.log('warning', f"Error downloading image {url}: {str(e)}")
+
+            with span("images", self.site):
+                download_images(
+                    image_tasks, self.session, max_workers=self.image_workers, site=self.site,
+                    on_bytes=self.progress.add_bytes, on_error=on_image_error)
+
+            # 直接转换已解析的正文节点，标题、链接、图例和数学公式由转换器处理
+            with span("markdown", self.site):
+                content = ArticleConverter(hexo_uploader=self.hexo_uploader).convert_tag(content_element).strip()
+
+        else:
+            content = ""
+
+        # 转化为 Markdown 格式
+        if content:
+            markdown = f"# {title}\n\n **Author:** [{author}]\n\n **Link:** [{target_link}]\n\n{content}"
+        else:
+            markdown = f"# {title}\n\n Content is empty."
+
+        # 保存 Markdown 文件
+        self.write_markdown(os.path.join(output_dir, f"{markdown_title}.md"), markdown)
+        ARTICLES_SAVED.inc(site=self.site)
+
+        # 有图片下载失败时不缓存结果，否则之后页面未修改时会一直复用缺图的输出
+        if failed_images:
+            self.log('warning', f"{len(failed_images)} images failed, not caching output of {target_link}")
+        else:
+            page_cache.store_output(self.page_key(target_link), output_dir, markdown_title)
+
+        return markdown_title
+
+    def write_markdown(self, path, markdown):
+        # 上次的结果可能是从页面缓存链接过来的，替换而不是原地改写
+        with span("write", self.site):
+            replace_file(path, markdown.encode("utf-8"))
+
+    def open_column_state(self, column_dir, column_id):
+        """
+        打开专栏的下载状态数据库，并导入专栏目录下旧版本的已处理 / 失败文件
+
+        设置了 STATE_DIR 时数据库为 STATE_DIR/<站点>/<专栏 ID>.db，不随输出目录删除，
+        否则保存在专栏目录中。
+        """
+        if STATE_DIR:
+            state_dir = os.path.join(STATE_DIR, self.site)
+            os.makedirs(state_dir, exist_ok=True)
+            path = os.path.join(state_dir, re.sub(r"[^\w-]", "_", column_id) + ".db")
+        else:
+            path = os.path.join(column_dir, f"{self.site}_state.db")
+        state = StateStore(path)
+        imported = state.import_text_files(
+            os.path.join(column_dir, f"{self.site}_processed_articles.txt"),
+            os.path.join(column_dir, f"{self.site}_failed_articles.txt"))
+        if imported:
+            self.log('info', f"Imported {imported} items from legacy progress files")
+        return state
+
+    def record_item_output(self, state, item_id, item_type, output_dir, markdown_title, url=None,
+                           source_updated=None):
+        """
+        记录条目已完成，以及输出文件的路径和 sha256
+        """
+        output_path = None
+        content_hash = None
+        if markdown_title:
+            # 文章保存为 <标题>.md，视频的 markdown_title 本身就是文件路径
+            output_path = os.path.join(output_dir, f"{markdown_title}.md")
+            if not os.path.isfile(output_path):
+                output_path = os.path.join(output_dir, markdown_title)
+            content_hash = file_sha256(output_path)
+        state.mark_done(item_id, item_type, output_path=output_path, content_hash=content_hash, url=url,
+                        source_updated=source_updated)
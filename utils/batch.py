@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from utils.registry import detect_site, create_parser
+from utils.profiling import profile_call
+from utils.progress import Progress
+
+logger = logging.getLogger('web_app')
+
+MANIFEST_FILE = "manifest.json"
+# 开启分析时各链接的分析结果保存在输出目录的该子目录中
+PROFILES_DIR = "profiles"
+
+# 每个站点同时处理的链接数，知乎和微信对频繁请求更敏感
+DEFAULT_SITE_LIMITS = {"zhihu": 2, "csdn": 4, "weixin": 2, "juejin": 4}
+
+
+def parse_url_list(text):
+    """
+    从文本中读取链接，每行一个，忽略空行和 # 开头的注释，重复的链接只保留一个
+    """
+    urls = []
+    seen = set()
+    for line in text.splitlines():
+        url = line.strip()
+        if not url or url.startswith("#") or url in seen:
+            continue
+        seen.add(url)
+        urls.append(url)
+    return urls
+
+
+def parse_site_limits(value):
+    """
+    解析形如 "zhihu=2,csdn=4" 的站点并发数设置，未给出的站点使用默认值
+    """
+    limits = dict(DEFAULT_SITE_LIMITS)
+    for part in (value or "").split(","):
+        if "=" not in part:
+            continue
+        site, limit = part.split("=", 1)
+        limits[site.strip().lower()] = max(1, int(limit))
+    return limits
+
+
+class BatchDownloader:
+    """
+    批量下载多个链接到同一目录
+
+    按主机名识别每个链接所属的站点，每个链接使用独立的解析器，输出写入 <站点>/ 子目录。
+    所有链接共用一个线程池，同时处理的链接数既不超过 max_workers，
+    也不超过各站点的上限；结束后在输出目录中写入每个链接的处理结果 manifest.json。
+    profile 为 True 时每个链接在分析器下执行，结果写入 profiles/<序号>_<站点>.*，路径记录在 manifest 中。
+    """
+
+    def __init__(self, output_dir, cookies="", keep_logs=False, max_workers=8, site_limits=None, profile=False):
+        self.output_dir = output_dir
+        self.cookies = cookies
+        self.keep_logs = keep_logs
+        self.max_workers = max_workers
+        self.site_limits = dict(DEFAULT_SITE_LIMITS if site_limits is None else site_limits)
+        self.profile = profile
+        # 与解析器的 progress 相同：每个链接为一个条目，下载的字节数在各链接完成时累加
+        self.progress = Progress()
+        self.results = []
+
+    def run(self, urls):
+        """
+        处理全部链接，返回按输入顺序排列的结果列表
+        """
+        self.results = [{"url": url, "website": detect_site(url), "status": "queued",
+                         "title": None, "path": None, "error": None, "seconds": None} for url in urls]
+        self.progress.start(total=len(urls))
+
+        queues = {}
+        for result in self.results:
+            if result["website"] is None:
+                result.update(status="unsupported", error="Unsupported website")
+                self.progress.fail()
+                continue
+            queues.setdefault(result["website"], deque()).append(result)
+            self.progress.discover()
+
+        running = {}
+        active = Counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as executor:
+            def fill():
+                # 依次为每个站点补充任务，直到达到站点上限或线程池上限
+                for site, pending in queues.items():
+                    limit = self.site_limits.get(site, self.max_workers)
+                    while pending and active[site] < limit and len(running) < self.max_workers:
+                        result = pending.popleft()
+                        active[site] += 1
+                        running[executor.submit(self.download, result)] = result
+
+            fill()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = running.pop(future)
+                    active[result["website"]] -= 1
+                fill()
+
+        self.write_manifest()
+        self.progress.finish()
+        return self.results
+
+    def download(self, result):
+        """
+        在工作线程中处理单个链接，结果写回 result
+        """
+        url, site = result["url"], result["website"]
+        site_dir = os.path.join(self.output_dir, site)
+        os.makedirs(site_dir, exist_ok=True)
+        result["status"] = "running"
+        start = time.perf_counter()
+        parser = None
+        try:
+            parser = create_parser(site, self.cookies, keep_logs=self.keep_logs, output_dir=site_dir)
+            if self.profile:
+                name = f"{self.results.index(result) + 1:04d}_{site}"
+                result["profile"] = f"{PROFILES_DIR}/{name}"
+                title = profile_call(os.path.join(self.output_dir, PROFILES_DIR), parser.judge_type, url, name=name)
+            else:
+                title = parser.judge_type(url)
+            if not title:
+                raise ValueError("No content was saved")
+            result.update(status="ok", title=title, path=f"{site}/{title}")
+            self.progress.done()
+            logger.info(f"Batch processed {url}, title: {title}")
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+            self.progress.fail()
+            logger.error(f"Batch error processing {site} URL {url}: {str(e)}")
+        finally:
+            result["seconds"] = round(time.perf_counter() - start, 3)
+            if parser is not None:
+                self.progress.add_bytes(parser.progress.bytes)
+
+    def summary(self):
+        return dict(Counter(result["status"] for result in self.results))
+
+    def write_manifest(self):
+        manifest = {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "summary": self.summary(),
+            "items": self.results,
+        }
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,426 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+
+def normalize_image_url(url):
+    """
+    规范化图片链接，使指向同一图片的不同链接得到相同的缓存键
+    """
+    parsed = urlparse(url.strip())
+    scheme = (parsed.scheme or "https").lower()
+    host = parsed.netloc.lower()
+    query = parsed.query
+
+    if host.endswith("zhimg.com"):
+        # 知乎图片分布在 pic1~pic4 等多个域名上，查询参数也不影响图片内容
+        host = re.sub(r"^pic\d*\.", "pic1.", host)
+        scheme = "https"
+        query = ""
+    elif query:
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+    return urlunparse((scheme, host, parsed.path, "", query, ""))
+
+
+def link_or_copy(src, dst):
+    """
+    优先使用硬链接，跨文件系统时退回到复制
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def replace_file(path, data):
+    """
+    先写入同目录下的临时文件再替换 path
+
+    path 可能是缓存对象的硬链接，直接以 "wb" 打开会改写缓存中的内容。
+    """
+    tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp_")
+    try:
+        with os.fdopen(tmp_fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ImageCache:
+    """
+    磁盘上的内容寻址图片缓存
+
+    urls/ 下按规范化链接记录图片内容的 sha256，objects/ 下按 sha256 保存图片数据，
+    相同内容只保存一份。总大小超过 max_bytes 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, root, max_bytes=1024 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.urls_dir = os.path.join(root, "urls")
+        self.objects_dir = os.path.join(root, "objects")
+        self.lock = threading.Lock()
+        self.total_bytes = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _url_path(self, url):
+        key = hashlib.sha1(normalize_image_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.urls_dir, key[:2], key)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _scan_total_bytes(self):
+        total = 0
+        for root, _, files in os.walk(self.objects_dir):
+            for file in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return total
+
+    def fetch(self, url, save_path):
+        """
+        命中缓存时把图片写入 save_path 并返回 True
+        """
+        if not self.enabled:
+            return False
+        try:
+            with open(self._url_path(url), "r", encoding="utf-8") as f:
+                digest = f.read().strip()
+            object_path = self._object_path(digest)
+            link_or_copy(object_path, save_path)
+            # 更新修改时间，作为 LRU 淘汰的依据
+            os.utime(object_path)
+        except OSError:
+            with self.lock:
+                self.misses += 1
+            return False
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def store(self, url, file_path):
+        """
+        将已下载的图片加入缓存，返回内容的 sha256
+        """
+        if not self.enabled:
+            return None
+
+        sha256 = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        object_path = self._object_path(digest)
+        url_path = self._url_path(url)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        os.makedirs(os.path.dirname(url_path), exist_ok=True)
+
+        added_bytes = 0
+        if not os.path.exists(object_path):
+            tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(object_path))
+            os.close(tmp_fd)
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, object_path)
+            added_bytes = os.path.getsize(object_path)
+        else:
+            os.utime(object_path)
+
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(url_path))
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
+            f.write(digest)
+        os.replace(tmp_path, url_path)
+
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_total_bytes()
+            else:
+                self.total_bytes += added_bytes
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+        return digest
+
+    def _evict(self):
+        """
+        按最近使用时间淘汰图片，直到总大小降到 max_bytes 的 90% 以下
+        """
+        entries = []
+        for root, _, files in os.walk(self.objects_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        # urls/ 中指向已删除图片的记录会在下次查找时自然失效
+        self.total_bytes = total
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "total_bytes": self.total_bytes}
+
+
+def page_key(url, cookies=None):
+    """
+    页面缓存的键
+
+    带 Cookies 请求到的页面因账号而异（付费、私密内容），键中加入 Cookies 的指纹，
+    只有使用相同 Cookies 的请求才会共用缓存。
+    """
+    if not cookies:
+        return url
+    return f"{url}#cookies={hashlib.sha256(cookies.encode('utf-8')).hexdigest()[:16]}"
+
+
+class PageCache:
+    """
+    持久化的 HTTP 页面缓存
+
+    每个页面保存 ETag/Last-Modified、压缩后的响应内容以及上次生成的 Markdown 文件，
+    再次请求时发送条件请求，返回 304 时直接复用已生成的文件。键由 page_key 生成。
+    总大小超过 max_bytes 时按最近使用时间淘汰整个页面，读取和淘汰都持有 self.lock，
+    条件请求之后页面已被淘汰时，读取方法返回 None，由调用方重新请求完整页面。
+    """
+
+    def __init__(self, root, enabled=True, max_bytes=512 * 1024 * 1024):
+        self.root = root
+        self.enabled = enabled and max_bytes > 0
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None
+
+    def _entry_dir(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _load_meta(self, key):
+        try:
+            with open(os.path.join(self._entry_dir(key), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        entry_dir = self._entry_dir(key)
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=entry_dir)
+        with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(entry_dir, "meta.json"))
+
+    def _entries(self):
+        """
+        返回 [(最近使用时间, 大小, 页面目录)]
+        """
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, name)
+                try:
+                    mtime = os.stat(entry_dir).st_mtime
+                except OSError:
+                    continue
+                size = 0
+                for root, _, files in os.walk(entry_dir):
+                    for file in files:
+                        try:
+                            size += os.path.getsize(os.path.join(root, file))
+                        except OSError:
+                            pass
+                entries.append((mtime, size, entry_dir))
+        return entries
+
+    def _added(self, added_bytes):
+        """
+        记录新写入的字节数，超出上限时淘汰，调用方持有 self.lock
+        """
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self.total_bytes += added_bytes
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        """
+        按最近使用时间淘汰页面，直到总大小降到 max_bytes 的 90% 以下
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, entry_dir in entries:
+            if total <= target:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+        self.total_bytes = total
+
+    def _touch(self, key):
+        # 页面目录的修改时间作为 LRU 淘汰的依据
+        try:
+            os.utime(self._entry_dir(key))
+        except OSError:
+            pass
+
+    def conditional_headers(self, key):
+        """
+        返回条件请求头，没有缓存时返回空字典
+        """
+        if not self.enabled:
+            return {}
+        with self.lock:
+            meta = self._load_meta(key)
+            if not meta or not os.path.exists(os.path.join(self._entry_dir(key), "body.gz")):
+                return {}
+            self._touch(key)
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def update(self, key, response):
+        """
+        保存新响应的校验信息和内容，旧的生成结果随之失效
+        """
+        if not self.enabled:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        entry_dir = self._entry_dir(key)
+        with self.lock:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            if not etag and not last_modified:
+                # 服务器不支持条件请求，不做缓存
+                return
+            os.makedirs(entry_dir, exist_ok=True)
+            with gzip.open(os.path.join(entry_dir, "body.gz"), "wb") as f:
+                f.write(response.content)
+            self._write_meta(key, {"key": key, "etag": etag, "last_modified": last_modified})
+            self._added(os.path.getsize(os.path.join(entry_dir, "body.gz")))
+
+    def cached_body(self, key):
+        """
+        读取缓存的响应内容，已被淘汰时返回 None
+        """
+        with self.lock:
+            try:
+                with gzip.open(os.path.join(self._entry_dir(key), "body.gz"), "rb") as f:
+                    return f.read()
+            except OSError:
+                return None
+
+    def store_output(self, key, output_dir, markdown_title):
+        """
+        保存页面生成的 Markdown 文件及其图片目录
+
+        图片复制而不是硬链接，页面缓存占用的空间只由 max_bytes 限制，不受图片缓存淘汰的影响。
+        """
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(key)
+        with self.lock:
+            # 请求页面之后可能已被淘汰
+            meta = self._load_meta(key)
+            if meta is None:
+                return
+            staging_dir = tempfile.mkdtemp(dir=entry_dir)
+            added_bytes = copy_output(output_dir, staging_dir, markdown_title, link=False)
+            target_dir = os.path.join(entry_dir, "output")
+            shutil.rmtree(target_dir, ignore_errors=True)
+            os.replace(staging_dir, target_dir)
+            meta["markdown_title"] = markdown_title
+            self._write_meta(key, meta)
+            self._added(added_bytes)
+
+    def restore_output(self, key, output_dir):
+        """
+        将上次生成的文件恢复到 output_dir，返回 Markdown 标题；没有生成结果或已被淘汰时返回 None
+        """
+        # 检查和复制都与淘汰互斥，避免复制到一半时页面被删除
+        with self.lock:
+            meta = self._load_meta(key)
+            output = os.path.join(self._entry_dir(key), "output")
+            if not meta or not meta.get("markdown_title") or not os.path.isdir(output):
+                return None
+            markdown_title = meta["markdown_title"]
+            try:
+                copy_output(output, output_dir, markdown_title)
+            except OSError:
+                return None
+            self._touch(key)
+        return markdown_title
+
+
+def copy_output(src_dir, dst_dir, markdown_title, link=True):
+    """
+    复制 markdown_title.md 以及同名图片目录，link 为 True 时优先使用硬链接，返回复制的字节数
+    """
+    copy = link_or_copy if link else shutil.copyfile
+    os.makedirs(dst_dir, exist_ok=True)
+    files = [(os.path.join(src_dir, f"{markdown_title}.md"), os.path.join(dst_dir, f"{markdown_title}.md"))]
+    assets_dir = os.path.join(src_dir, markdown_title)
+    if os.path.isdir(assets_dir):
+        for root, _, names in os.walk(assets_dir):
+            target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+            os.makedirs(target_root, exist_ok=True)
+            files.extend((os.path.join(root, name), os.path.join(target_root, name)) for name in names)
+    copied = 0
+    for src, dst in files:
+        copy(src, dst)
+        copied += os.path.getsize(dst)
+    return copied
+
+
+# 进程内共享的图片缓存，IMAGE_CACHE_MAX_BYTES=0 时关闭
+image_cache = ImageCache(
+    os.environ.get("IMAGE_CACHE_DIR", os.path.join(".", "cache", "images")),
+    int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 1024 * 1024 * 1024)),
+)
+
+# 进程内共享的页面缓存，PAGE_CACHE_ENABLED=0 或 PAGE_CACHE_MAX_BYTES=0 时关闭
+page_cache = PageCache(
+    os.environ.get("PAGE_CACHE_DIR", os.path.join(".", "cache", "pages")),
+    os.environ.get("PAGE_CACHE_ENABLED", "1") != "0",
+    int(os.environ.get("PAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)),
+)
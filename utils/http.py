@@ -0,0 +1,68 @@
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('web_app')
+
+# 请求后端："requests"（默认）或 "httpx"（可选依赖，安装 h2 后支持 HTTP/2 多路复用）
+HTTP_BACKEND = os.environ.get("HTTP_BACKEND", "requests").lower()
+
+# 缓存连接池的主机数量，知乎图片分布在 pic1~pic4 等多个域名上
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 64))
+# 每个主机保持的空闲连接数，应不小于同时访问同一主机的线程数（专栏 worker × 图片下载线程）
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 32))
+
+
+class SharedHTTPAdapter(HTTPAdapter):
+    """
+    进程内所有会话共用的连接池
+
+    会话关闭时不关闭连接池，其他会话仍在使用；进程退出前可以调用 close_pool。
+    重试由 rate_limiter 负责，这里不再重试。
+    """
+
+    def close(self):
+        pass
+
+    def close_pool(self):
+        super().close()
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def shared_adapter():
+    """
+    返回进程内共享的 HTTPAdapter，第一次使用时创建
+    """
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                _adapter = SharedHTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    return _adapter
+
+
+def new_session(backend=None):
+    """
+    创建使用共享连接池的会话
+
+    每个请求（解析器）使用各自的会话，Cookies 和请求头互不影响；
+    到同一主机的 TCP/TLS 连接在所有会话之间复用。backend 默认取 HTTP_BACKEND，
+    指定 httpx 但未安装时退回到 requests。
+    """
+    if (backend or HTTP_BACKEND) == "httpx":
+        from utils.http_async import AsyncBackendSession, httpx
+        if httpx is not None:
+            return AsyncBackendSession()
+        logger.warning("HTTP_BACKEND=httpx but httpx is not installed, using requests")
+
+    session = requests.Session()
+    adapter = shared_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
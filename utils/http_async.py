@@ -0,0 +1,172 @@
+import asyncio
+import importlib.util
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import httpx
+except ImportError:  # httpx 为可选依赖
+    httpx = None
+
+# 未指定超时时使用，requests 默认不限时，httpx 默认只有 5 秒
+DEFAULT_TIMEOUT = (10, 60)
+
+
+def http2_available():
+    """
+    HTTP/2 需要额外安装 h2（pip install "httpx[http2]"）
+    """
+    return importlib.util.find_spec("h2") is not None
+
+
+class EventLoopThread:
+    """
+    在后台线程中运行的事件循环，同步代码通过 run 提交协程并等待结果
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="http-async", daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        try:
+            return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TooManyRedirects as e:
+            raise requests.exceptions.TooManyRedirects(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+
+
+_loop_thread = None
+_transport = None
+_lock = threading.Lock()
+
+
+def loop_thread():
+    global _loop_thread
+    if _loop_thread is None:
+        with _lock:
+            if _loop_thread is None:
+                _loop_thread = EventLoopThread()
+    return _loop_thread
+
+
+def shared_transport():
+    """
+    进程内共享的 httpx 连接池，可用时启用 HTTP/2，同一主机的请求在一个连接上多路复用
+    """
+    global _transport
+    if _transport is None:
+        with _lock:
+            if _transport is None:
+                from utils.http import POOL_CONNECTIONS, POOL_MAXSIZE
+                _transport = httpx.AsyncHTTPTransport(
+                    http2=http2_available(),
+                    limits=httpx.Limits(max_connections=None,
+                                        max_keepalive_connections=POOL_CONNECTIONS * POOL_MAXSIZE),
+                )
+    return _transport
+
+
+async def _next_chunk(chunks):
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class StreamBody:
+    """
+    把 httpx 的响应体包装成同步的文件对象，作为 requests.Response.raw 供 iter_content 读取
+    """
+
+    def __init__(self, loop, response):
+        self.loop = loop
+        self.response = response
+        self.chunks = response.aiter_bytes()
+        self.buffer = bytearray()
+        self.finished = False
+        self.closed = False
+
+    def read(self, amt=None):
+        while not self.finished and (amt is None or len(self.buffer) < amt):
+            chunk = self.loop.run(_next_chunk(self.chunks))
+            if chunk is None:
+                self.finished = True
+            else:
+                self.buffer += chunk
+        if amt is None:
+            amt = len(self.buffer)
+        data = bytes(self.buffer[:amt])
+        del self.buffer[:amt]
+        return data
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.loop.run(self.response.aclose())
+
+
+class AsyncBackendSession:
+    """
+    与 requests.Session 用法相同的会话，请求在后台事件循环中通过 httpx 发送
+
+    rate_limiter.request、check_connect_error、download_image 和 download_video
+    只用到 headers 和 request()，返回的是 requests.Response，异常也转换为 requests 的异常，
+    调用方不需要区分后端。各会话的 Cookies 互相独立，连接池在进程内共享；
+    多个线程同时请求同一主机时，HTTP/2 下共用一个连接。
+    """
+
+    def __init__(self, transport=None):
+        self.loop = loop_thread()
+        self.headers = CaseInsensitiveDict()
+        self.client = httpx.AsyncClient(transport=transport or shared_transport(), follow_redirects=True)
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False, timeout=None):
+        merged_headers = CaseInsensitiveDict(self.headers)
+        merged_headers.update(headers or {})
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        if timeout is None:
+            connect_timeout, read_timeout = DEFAULT_TIMEOUT
+        request = self.client.build_request(
+            method, url, headers=dict(merged_headers), params=params, data=data,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+        response = self.loop.run(self._send(request, stream))
+        return self._to_response(response, stream)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    async def _send(self, request, stream):
+        response = await self.client.send(request, stream=True)
+        if not stream:
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        return response
+
+    def _to_response(self, response, stream):
+        result = requests.Response()
+        result.status_code = response.status_code
+        result.headers = CaseInsensitiveDict(response.headers.items())
+        result.url = str(response.url)
+        result.reason = response.reason_phrase
+        result.encoding = get_encoding_from_headers(result.headers)
+        if stream:
+            result.raw = StreamBody(self.loop, response)
+        else:
+            result._content = response.content
+        return result
+
+    def close(self):
+        # 连接池由所有会话共享，不随会话关闭
+        pass
@@ -0,0 +1,117 @@
+import logging
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.progress import Progress
+
+logger = logging.getLogger('web_app')
+
+
+class Job:
+    """
+    一个后台下载任务
+    """
+
+    def __init__(self, website, url):
+        self.id = uuid.uuid4().hex
+        self.website = website
+        self.url = url
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.output_dir = None
+        self.title = None
+        self.error = None
+        # 运行中的解析器，其 progress 替换为任务的进度
+        self.parser = None
+        # 解析器更新的进度；任务开始和结束时同样发出通知，SSE 接口据此推送任务状态
+        self.progress = Progress()
+
+    def to_dict(self):
+        progress = self.progress.snapshot()
+        return {
+            "id": self.id,
+            "website": self.website,
+            "url": self.url,
+            "status": self.status,
+            "title": self.title,
+            "error": self.error,
+            "progress": progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    使用线程池在后台执行下载任务，并在任务过期后清理输出目录
+
+    过期任务在提交、查询时清理，另有后台线程每隔 cleanup_interval 秒清理一次，没有请求时也会删除。
+    """
+
+    def __init__(self, max_workers=4, ttl=3600, cleanup_interval=60):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.ttl = ttl
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.cleanup_interval = cleanup_interval
+        if cleanup_interval > 0:
+            threading.Thread(target=self._cleanup_loop, name="job-cleanup", daemon=True).start()
+
+    def submit(self, website, url, target):
+        """
+        提交任务，target(job) 在后台线程中执行并返回 Markdown 标题
+        """
+        self.cleanup_expired()
+        job = Job(website, url)
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, target)
+        return job
+
+    def get(self, job_id):
+        self.cleanup_expired()
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, target):
+        job.status = "running"
+        job.started_at = time.time()
+        job.progress.start()
+        try:
+            job.title = target(job)
+            job.status = "finished"
+        except Exception as e:
+            logger.error(f"Job {job.id} for {job.url} failed: {str(e)}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            job.progress.finish()
+
+    def _cleanup_loop(self):
+        while True:
+            time.sleep(self.cleanup_interval)
+            try:
+                self.cleanup_expired()
+            except Exception as e:
+                logger.error(f"Failed to clean up expired jobs: {str(e)}")
+
+    def cleanup_expired(self):
+        """
+        删除已结束且超过 ttl 秒的任务及其输出目录
+        """
+        now = time.time()
+        with self.lock:
+            expired = [job for job in self.jobs.values()
+                       if job.finished_at is not None and now - job.finished_at > self.ttl]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            if job.output_dir:
+                shutil.rmtree(job.output_dir, ignore_errors=True)
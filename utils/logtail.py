@@ -0,0 +1,111 @@
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+
+BLOCK_SIZE = 64 * 1024
+
+# 日志文件按大小轮转：单个文件的上限（字节）和保留的旧文件数
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", 5))
+
+
+def rotating_handler(path, fmt="%(asctime)s - %(levelname)s - %(message)s"):
+    """按大小轮转的 UTF-8 日志文件，LOG_MAX_BYTES 为 0 时不轮转"""
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+                                  encoding="utf-8")
+    handler.setFormatter(logging.Formatter(fmt))
+    return handler
+
+
+def decode(data):
+    # 日志按 UTF-8 写入，无法解码的字节（如截断的多字节字符）替换掉，不再尝试其他编码
+    return data.decode("utf-8", errors="replace")
+
+
+def tail(path, lines, block_size=BLOCK_SIZE):
+    """
+    从文件末尾向前按块读取，返回最后 lines 个完整行的 (bytes, 起始偏移, 结束偏移)
+
+    末尾还没有写完的行不返回，结束偏移总在行首，可以直接作为 read_from 的 offset。
+    """
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        # 第 lines + 1 个换行之后才是第一行的开头
+        while position > 0 and data.count(b"\n") <= lines:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            data = f.read(read_size) + data
+    data = data[:data.rfind(b"\n") + 1]
+    newlines = data.count(b"\n")
+    cut = 0
+    for _ in range(newlines - lines):
+        cut = data.index(b"\n", cut) + 1
+    return data[cut:], position + cut, position + len(data)
+
+
+def read_from(path, offset, max_bytes=1024 * 1024):
+    """
+    从字节偏移 offset 开始读取，最多 max_bytes 字节，只返回完整的行
+
+    返回 (bytes, 实际起始偏移, 下一次读取的偏移)。offset 超出文件大小时说明日志已经轮转，从头读取。
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        if offset > size:
+            offset = 0
+        f.seek(offset)
+        data = f.read(max_bytes)
+    if len(data) == max_bytes:
+        # 读到上限时截到最后一个换行，剩余部分留给下一次；单行超过上限时按字节截断
+        if b"\n" in data:
+            data = data[:data.rindex(b"\n") + 1]
+    elif not data.endswith(b"\n"):
+        # 最后一行可能还没有写完
+        data = data[:data.rfind(b"\n") + 1]
+    return data, offset, offset + len(data)
+
+
+def follow(path, offset, poll_interval=0.5, keepalive=15.0, max_seconds=None):
+    """
+    持续读取 offset 之后追加的内容，生成 (bytes, 下一次读取的偏移)
+
+    文件被轮转（变小或被替换）时读完旧文件剩余的行，再从新文件的开头继续；没有新内容时每隔 keepalive 秒生成一次空数据，
+    调用方可以借此检测客户端是否已断开。max_seconds 为最长跟随时间。
+    """
+    started = time.monotonic()
+    last_sent = started
+    try:
+        inode = os.stat(path).st_ino
+    except OSError:
+        inode = None
+    while max_seconds is None or time.monotonic() - started < max_seconds:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stat = None
+        if stat is not None:
+            if stat.st_ino != inode or stat.st_size < offset:
+                # RotatingFileHandler 把旧文件重命名为 .1，先读完其中剩余的行
+                rotated = path + ".1"
+                try:
+                    if inode is not None and os.stat(rotated).st_ino == inode:
+                        data, _, _ = read_from(rotated, offset, os.path.getsize(rotated) + 1)
+                        if data:
+                            yield data, 0
+                except OSError:
+                    pass
+                inode = stat.st_ino
+                offset = 0
+            if stat.st_size > offset:
+                data, _, offset = read_from(path, offset)
+                if data:
+                    last_sent = time.monotonic()
+                    yield data, offset
+                    continue
+        if time.monotonic() - last_sent >= keepalive:
+            last_sent = time.monotonic()
+            yield b"", offset
+        time.sleep(poll_interval)
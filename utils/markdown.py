@@ -0,0 +1,178 @@
+from collections import Counter
+from urllib.parse import unquote, urlparse, parse_qs
+from bs4 import Comment, Doctype, NavigableString
+from markdownify import MarkdownConverter, ATX, chomp, whitespace_re
+from utils.util import format_math
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+CELL_TAGS = frozenset(['td', 'th'])
+NESTED_TAGS = frozenset(['ol', 'ul', 'li', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'])
+CODE_TAGS = ('pre', 'code', 'kbd', 'samp')
+# 直接丢弃、不处理子节点的标签
+SKIPPED_TAGS = frozenset(['script', 'style'])
+
+
+def unwrap_link(href):
+    """
+    取出跳转链接中的真实地址，例如知乎外链 https://link.zhihu.com/?target=<编码后的链接>
+    """
+    query_params = parse_qs(urlparse(href).query)
+    return unquote(query_params.get('target', [href])[0])
+
+
+def is_math(tag):
+    return tag.name == 'span' and 'ztext-math' in tag.get('class', ())
+
+
+class ArticleConverter(MarkdownConverter):
+    """
+    文章正文的 Markdown 转换器
+
+    标题输出为 ATX 格式，链接取出跳转前的真实地址，图片和图例单独成段，
+    知乎公式节点直接输出 LaTeX。各标签的转换函数在每个转换器中只查找一次；
+    祖先标签（pre、code、figure 等）在遍历时计数，不再为每个文本节点向上查找。
+    一个转换器同一时间只能用于一次转换。
+    """
+
+    class Options(MarkdownConverter.DefaultOptions):
+        heading_style = ATX
+        # 在公式前后加上 {% raw %} {% endraw %}，以便 hexo 正确解析
+        hexo_uploader = False
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._convert_fns = {}
+        # 当前节点的祖先标签计数
+        self._open_tags = Counter()
+
+    def convert_tag(self, tag):
+        """
+        直接转换已解析的节点（不含节点本身），不再序列化为 HTML 后重新解析
+        """
+        return self.process_tag(tag, convert_as_inline=False, children_only=True)
+
+    def convert_fn(self, name):
+        """
+        返回标签对应的转换函数，不需要转换时返回 None
+        """
+        try:
+            return self._convert_fns[name]
+        except KeyError:
+            fn = getattr(self, f'convert_{name}', None)
+            if fn is not None and not self.should_convert_tag(name):
+                fn = None
+            self._convert_fns[name] = fn
+            return fn
+
+    def process_tag(self, node, convert_as_inline, children_only=False):
+        name = node.name
+        if not children_only:
+            if name in SKIPPED_TAGS:
+                return ''
+            if is_math(node):
+                return self.convert_math(node, convert_as_inline)
+
+        # markdown headings or cells can't include
+        # block elements (elements w/newlines)
+        convert_children_as_inline = convert_as_inline
+        if not children_only and (name in HEADING_TAGS or name in CELL_TAGS):
+            convert_children_as_inline = True
+
+        # Remove whitespace-only textnodes in purely nested nodes
+        if name in NESTED_TAGS:
+            for el in node.children:
+                can_extract = (not el.previous_sibling
+                               or not el.next_sibling
+                               or el.previous_sibling.name in NESTED_TAGS
+                               or el.next_sibling.name in NESTED_TAGS)
+                if isinstance(el, NavigableString) and str(el).strip() == '' and can_extract:
+                    el.extract()
+
+        parts = []
+        self._open_tags[name] += 1
+        try:
+            for el in node.children:
+                if isinstance(el, NavigableString):
+                    if isinstance(el, (Comment, Doctype)):
+                        continue
+                    parts.append(self.process_text(el))
+                else:
+                    parts.append(self.process_tag(el, convert_children_as_inline))
+        finally:
+            self._open_tags[name] -= 1
+        text = ''.join(parts)
+
+        if not children_only:
+            convert_fn = self.convert_fn(name)
+            if convert_fn is not None:
+                text = convert_fn(node, text, convert_as_inline)
+        return text
+
+    def inside(self, *names):
+        return any(self._open_tags[name] for name in names)
+
+    def process_text(self, el):
+        text = str(el) or ''
+
+        # normalize whitespace if we're not inside a preformatted element
+        if not self.inside('pre'):
+            text = whitespace_re.sub(' ', text)
+
+        # escape special characters if we're not inside a preformatted or code element
+        if not self.inside(*CODE_TAGS):
+            text = self.escape(text)
+
+        # remove trailing whitespaces if any of the following condition is true:
+        # - current text node is the last node in li
+        # - current text node is followed by an embedded list
+        if (el.parent.name == 'li'
+                and (not el.next_sibling
+                     or el.next_sibling.name in ['ul', 'ol'])):
+            text = text.rstrip()
+
+        return text
+
+    def convert_math(self, el, convert_as_inline):
+        latex_formula = el['data-tex']
+        # 带 \tag 的公式为独立公式
+        block = latex_formula.find("\\tag") != -1
+        math = format_math(latex_formula, block, self.options['hexo_uploader'])
+        if block and not convert_as_inline:
+            return math + '  \n'
+        return math
+
+    def convert_a(self, el, text, convert_as_inline):
+        href = el.get('href')
+        if not href:
+            return super().convert_a(el, text, convert_as_inline)
+        article_url = unwrap_link(href)
+        prefix, suffix, text = chomp(text)
+        # 优先使用 data-text 作为标题，其次是链接文字，都没有时使用链接本身
+        if el.get('data-text'):
+            article_title = self.escape(el['data-text'])
+        else:
+            article_title = text or article_url
+        return f"{prefix}[{article_title}]({article_url}){suffix}"
+
+    def convert_img(self, el, text, convert_as_inline):
+        image = super().convert_img(el, text, convert_as_inline)
+        if convert_as_inline or not image:
+            return image
+        if self.inside('figure'):
+            return image + '\n\n'
+        # 图片后换行
+        return image + '  \n'
+
+    def convert_figcaption(self, el, text, convert_as_inline):
+        text = text.strip()
+        if not text:
+            return ''
+        if self.inside('figure'):
+            return text + '\n\n'
+        return '\n\n' + text + '\n\n'
+
+    def convert_figure(self, el, text, convert_as_inline):
+        if convert_as_inline:
+            return text
+        text = text.strip()
+        return '\n\n' + text + '\n\n' if text else ''
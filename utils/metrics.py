@@ -0,0 +1,170 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# 阶段耗时的桶上限（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """
+    带标签的指标，每组标签值对应一个序列
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self.lock:
+            series = sorted(self.series.items())
+        for key, value in series:
+            lines.extend(self._render_series(list(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self.lock:
+            return self.series.get(self._key(labels), 0)
+
+    def _render_series(self, labels, value):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                # 各桶的计数（非累计）、总和、次数
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_series(self, labels, series):
+        counts, total, count = series
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(float(bound)))])} "
+                         f"{cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    进程内的指标集合，以 Prometheus 文本格式输出
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "download_stage_seconds", "Time spent in each download stage",
+    ("site", "stage"))
+BYTES_DOWNLOADED = metrics.counter(
+    "download_bytes_total", "Bytes downloaded from the network",
+    ("site", "kind"))
+IMAGES_FETCHED = metrics.counter(
+    "download_images_total", "Images saved, from the network or the image cache",
+    ("site",))
+CACHE_HITS = metrics.counter(
+    "download_cache_hits_total", "Page and image cache hits",
+    ("site", "cache"))
+CACHE_MISSES = metrics.counter(
+    "download_cache_misses_total", "Page and image cache misses",
+    ("site", "cache"))
+ARTICLES_SAVED = metrics.counter(
+    "download_articles_total", "Markdown files written",
+    ("site",))
+
+
+def span(stage, site=None):
+    """
+    记录一个阶段的耗时：fetch、parse、rewrite、images、markdown、write、zip 等
+    """
+    return STAGE_SECONDS.time(site=site or "unknown", stage=stage)
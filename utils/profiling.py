@@ -0,0 +1,144 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+logger = logging.getLogger('web_app')
+
+PROFILE_NAME = "profile"
+# 调用栈采样间隔（秒）
+SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", 0.005))
+# <name>.txt 中列出的函数数
+STATS_LIMIT = 60
+
+
+# 当前线程所属的采样，profile_call 的调用线程以及由它启动的线程池线程都会设置
+_current = threading.local()
+
+
+class StackSampler:
+    """
+    按固定间隔采样线程的调用栈，汇总为折叠格式（每行 "线程;帧;帧... 次数"）
+
+    只采样调用线程，以及被分析的调用中启动、通过 profile_initializer 加入的线程
+    （图片下载、专栏文章等线程池），其他任务和请求的线程不计入。
+    cProfile 只能看到调用线程，线程池中的耗时要从这里看。
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+        # 线程 ID -> 线程对象，线程结束后 ID 可能被复用，采样时同时比较线程对象
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def add_current_thread(self):
+        """
+        采样当前线程，之后在该线程中启动的线程池也会加入
+        """
+        thread = threading.current_thread()
+        with self.lock:
+            self.threads[thread.ident] = thread
+        _current.sampler = self
+
+    def start(self):
+        self.add_current_thread()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            alive = {thread.ident: thread for thread in threading.enumerate()}
+            with self.lock:
+                threads = dict(self.threads)
+            for ident, frame in sys._current_frames().items():
+                thread = threads.get(ident)
+                if thread is not None and alive.get(ident) is thread:
+                    self.stacks[collapse_stack(thread.name, frame)] += 1
+            self.samples += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def profile_initializer():
+    """
+    返回线程池的 initializer：当前线程正在被采样时，线程池的线程也加入同一个采样
+
+    在启动线程池的线程中调用，没有在采样时返回的函数什么也不做。
+    """
+    sampler = getattr(_current, "sampler", None)
+
+    def initializer():
+        if sampler is not None:
+            sampler.add_current_thread()
+    return initializer
+
+
+def collapse_stack(thread_name, frame):
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(thread_name.replace(";", ":").replace(" ", "_"))
+    return ";".join(reversed(frames))
+
+
+def profile_call(output_dir, fn, *args, name=PROFILE_NAME, **kwargs):
+    """
+    在 cProfile 和调用栈采样下执行 fn(*args, **kwargs)，返回其结果，异常照常抛出
+
+    结果写入 output_dir：
+    - <name>.prof：调用线程的 cProfile 数据，用 snakeviz 或 pstats 查看
+    - <name>.txt：按累计耗时排序的函数列表
+    - <name>.folded：折叠格式的调用栈，用 flamegraph.pl 或 speedscope 生成火焰图
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12 起同一时间只能有一个 cProfile，此时只保留采样结果
+        logger.warning(f"cProfile unavailable, sampling only: {e}")
+        profiler = None
+    previous = getattr(_current, "sampler", None)
+    sampler = StackSampler().start()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        sampler.stop()
+        _current.sampler = previous
+        try:
+            write_profile(output_dir, name, profiler, sampler)
+        except OSError as e:
+            logger.error(f"Failed to write profile {name} to {output_dir}: {e}")
+
+
+def write_profile(output_dir, name, profiler, sampler):
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, name)
+    sampler.write(f"{base}.folded")
+    summary = io.StringIO()
+    summary.write(f"{sampler.samples} stack samples every {sampler.interval * 1000:g} ms in {name}.folded\n\n")
+    if profiler is not None:
+        profiler.dump_stats(f"{base}.prof")
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(STATS_LIMIT)
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
@@ -0,0 +1,106 @@
+import threading
+import time
+
+
+class Progress:
+    """
+    下载进度：发现、完成、失败的条目数和下载的字节数，每次变化都通知等待者
+
+    专栏和批量下载的循环只更新计数，不负责展示；后台任务接口读取 snapshot()，
+    SSE 接口通过 wait() 等待下一次变化。
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        # 总条目数，-1 表示未知；already_processed 为之前已经下载过、本次跳过的条目
+        self.total = -1
+        self.already_processed = 0
+        self.discovered = 0
+        self.success = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def _changed(self):
+        self.version += 1
+        self.condition.notify_all()
+
+    def start(self, total=-1, already_processed=0):
+        """开始处理，ETA 从此时开始计算"""
+        with self.condition:
+            self.started_at = time.time()
+            self.total = total
+            self.already_processed = already_processed
+            self._changed()
+
+    def discover(self, count=1):
+        """找到 count 个需要下载的条目"""
+        with self.condition:
+            self.discovered += count
+            self._changed()
+
+    def done(self, count=1):
+        with self.condition:
+            self.success += count
+            self._changed()
+
+    def fail(self, count=1):
+        with self.condition:
+            self.failed += count
+            self._changed()
+
+    def add_bytes(self, count):
+        with self.condition:
+            self.bytes += count
+            self._changed()
+
+    def finish(self):
+        with self.condition:
+            if self.finished_at is None:
+                self.finished_at = time.time()
+            self._changed()
+
+    def eta(self, now=None):
+        """
+        按已完成条目的平均耗时估计剩余秒数，无法估计时返回 None
+
+        总数已知时剩余条目为总数减去已处理的部分，否则为已发现、尚未完成的条目。
+        """
+        processed = self.success + self.failed
+        if self.finished_at is not None:
+            return 0
+        remaining = self.discovered - processed
+        if self.total > 0:
+            remaining = max(remaining, self.total - self.already_processed - processed)
+        if processed == 0:
+            return None
+        if remaining <= 0:
+            return 0
+        elapsed = (now or time.time()) - self.started_at
+        return round(elapsed / processed * remaining, 1)
+
+    def snapshot(self):
+        with self.condition:
+            now = self.finished_at or time.time()
+            return {
+                "total": self.total,
+                "already_processed": self.already_processed,
+                "discovered": self.discovered,
+                "success": self.success,
+                "failed": self.failed,
+                "bytes": self.bytes,
+                "elapsed": round(now - self.started_at, 1),
+                "eta": self.eta(now),
+                "finished": self.finished_at is not None,
+                "version": self.version,
+            }
+
+    def wait(self, version, timeout=None):
+        """
+        等待进度版本超过 version 或超时，返回当前版本
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version, timeout=timeout)
+            return self.version
@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+# 各站点（按域名后缀匹配）的默认限速：(每秒请求数, 突发容量)
+DEFAULT_HOST_LIMITS = {
+    "zhihu.com": (4.0, 8),
+    "zhimg.com": (20.0, 40),
+    "csdn.net": (4.0, 8),
+    "csdnimg.cn": (20.0, 40),
+    "mp.weixin.qq.com": (4.0, 8),
+    "qpic.cn": (20.0, 40),
+    "juejin.cn": (4.0, 8),
+    "byteimg.com": (20.0, 40),
+}
+
+# 需要退避重试的状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    令牌桶，rate 为每秒补充的令牌数，capacity 为桶容量
+    """
+
+    def __init__(self, rate, capacity):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        取出一个令牌，令牌不足或主机处于退避期时阻塞等待，返回等待的秒数
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """
+        在 seconds 秒内暂停该主机的所有请求，并将速率减半
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def recover(self):
+        """
+        请求成功后逐步恢复速率
+        """
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class HostRateLimiter:
+    """
+    按主机限速的请求层：令牌桶限流，遇到 429/5xx 时指数退避并加入随机抖动，
+    优先遵循服务器返回的 Retry-After
+    """
+
+    def __init__(self, host_limits=None, default_limit=(8.0, 16), max_retries=4,
+                 base_delay=1.0, max_delay=60.0):
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.default_limit = default_limit
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.buckets = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def _limit_for(self, host):
+        for suffix, limit in self.host_limits.items():
+            if host == suffix or host.endswith("." + suffix):
+                return limit
+        return self.default_limit
+
+    def bucket(self, host):
+        """
+        获取指定主机的令牌桶
+        """
+        with self.lock:
+            if host not in self.buckets:
+                rate, capacity = self._limit_for(host)
+                self.buckets[host] = TokenBucket(rate, capacity)
+                self.counters[host] = {
+                    "requests": 0,
+                    "throttled": 0,
+                    "server_errors": 0,
+                    "connection_errors": 0,
+                    "retries": 0,
+                    "failures": 0,
+                    "wait_seconds": 0.0,
+                }
+            return self.buckets[host]
+
+    def _count(self, host, name, value=1):
+        with self.lock:
+            self.counters[host][name] += value
+
+    def backoff_delay(self, attempt, response=None):
+        """
+        计算第 attempt 次重试前的等待时间
+        """
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(self.max_delay, retry_after)
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        # full jitter，避免多个线程同时重试
+        return random.uniform(delay / 2, delay)
+
+    def request(self, session, url, method="GET", **kwargs):
+        """
+        通过限速层发送请求，返回最后一次的响应
+        """
+        host = urlparse(url).netloc
+        bucket = self.bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            self._count(host, "wait_seconds", bucket.acquire())
+            self._count(host, "requests")
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._count(host, "connection_errors")
+                if attempt == self.max_retries:
+                    self._count(host, "failures")
+                    raise
+                self._count(host, "retries")
+                bucket.pause(self.backoff_delay(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                bucket.recover()
+                return response
+
+            if response.status_code == 429:
+                self._count(host, "throttled")
+            else:
+                self._count(host, "server_errors")
+
+            if attempt == self.max_retries:
+                self._count(host, "failures")
+                return response
+
+            self._count(host, "retries")
+            bucket.pause(self.backoff_delay(attempt, response))
+            response.close()
+
+    def stats(self):
+        """
+        返回各主机的计数器和当前速率，用于调整吞吐量与封禁率之间的平衡
+        """
+        with self.lock:
+            return {
+                host: dict(counters, rate=round(self.buckets[host].rate, 3))
+                for host, counters in self.counters.items()
+            }
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# 进程内所有解析器共享的限速器
+rate_limiter = HostRateLimiter()
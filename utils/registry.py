@@ -0,0 +1,74 @@
+import importlib
+import re
+import threading
+from urllib.parse import urlparse
+
+
+class SitePlugin:
+    """
+    一个站点解析器插件：按主机名匹配链接，首次使用时才导入解析器模块
+    """
+
+    def __init__(self, name, host_pattern, module, class_name, needs_cookies=False):
+        self.name = name
+        self.host_pattern = re.compile(host_pattern)
+        self.module = module
+        self.class_name = class_name
+        # 是否把用户提供的 Cookies 传给解析器
+        self.needs_cookies = needs_cookies
+        self._parser_class = None
+        self._lock = threading.Lock()
+
+    def matches(self, host):
+        return self.host_pattern.search(host) is not None
+
+    @property
+    def parser_class(self):
+        """
+        导入并缓存解析器类，bs4、markdownify 等依赖在此时才加载
+        """
+        if self._parser_class is None:
+            with self._lock:
+                if self._parser_class is None:
+                    module = importlib.import_module(self.module)
+                    self._parser_class = getattr(module, self.class_name)
+        return self._parser_class
+
+    def create(self, cookies="", **options):
+        if self.needs_cookies:
+            return self.parser_class(cookies, **options)
+        return self.parser_class(**options)
+
+
+# 站点名称 -> 插件，主机名按域名后缀匹配
+SITE_PLUGINS = {
+    plugin.name: plugin for plugin in (
+        SitePlugin("zhihu", r"(^|\.)zhihu\.com$", "main_zhihu", "ZhihuParser", needs_cookies=True),
+        SitePlugin("csdn", r"(^|\.)csdn\.net$", "main_csdn", "CsdnParser"),
+        SitePlugin("weixin", r"^mp\.weixin\.qq\.com$", "main_weixin", "WeixinParser"),
+        SitePlugin("juejin", r"(^|\.)juejin\.cn$", "main_juejin", "JuejinParser"),
+    )
+}
+
+SUPPORTED_WEBSITES = tuple(SITE_PLUGINS)
+
+
+def detect_site(url):
+    """
+    根据链接的主机名判断所属站点，无法识别时返回 None
+    """
+    host = (urlparse(url.strip()).hostname or "").lower()
+    for plugin in SITE_PLUGINS.values():
+        if plugin.matches(host):
+            return plugin.name
+    return None
+
+
+def create_parser(website, cookies="", **options):
+    """
+    创建指定站点的解析器，不支持的站点返回 None
+    """
+    plugin = SITE_PLUGINS.get(website)
+    if plugin is None:
+        return None
+    return plugin.create(cookies, **options)
@@ -0,0 +1,72 @@
+import os
+from bs4 import Tag
+
+
+class ContentRewriter:
+    """
+    在一次遍历中改写正文节点，按标签名分派到 visit_<标签名> 方法
+
+    图片改为本地路径并记录下载任务；标题、链接、图例和公式由 Markdown 转换器直接处理。
+    visit 方法返回 True 时继续遍历该节点的子节点。
+    """
+
+    def __init__(self, parser, markdown_title, output_dir):
+        self.parser = parser
+        self.markdown_title = markdown_title
+        self.output_dir = output_dir
+        # (图片链接, 保存路径)，遍历结束后统一并发下载
+        self.image_tasks = []
+
+    _dispatch_cache = {}
+
+    @classmethod
+    def _visitor(cls, name):
+        """
+        按标签名查找 visit 方法并缓存
+        """
+        key = (cls, name)
+        try:
+            return cls._dispatch_cache[key]
+        except KeyError:
+            visitor = getattr(cls, f"visit_{name}", None)
+            cls._dispatch_cache[key] = visitor
+            return visitor
+
+    def rewrite(self, content_element):
+        """
+        先序遍历 content_element 的所有子孙节点，返回图片下载任务
+        """
+        stack = list(reversed(content_element.contents))
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, Tag):
+                continue
+            visitor = self._visitor(node.name)
+            if visitor is not None and not visitor(self, node):
+                continue
+            stack.extend(reversed(node.contents))
+        return self.image_tasks
+
+    def visit_script(self, tag):
+        return False
+
+    def visit_style(self, tag):
+        return False
+
+    def visit_img(self, img):
+        if self.parser.skip_image(img):
+            img.decompose()
+            return False
+        try:
+            target = self.parser.image_target(img, self.markdown_title, len(self.image_tasks))
+            if target is None:
+                return False
+            img_url, img_path = target
+            img["src"] = img_path
+
+            # 先记录下载任务，稍后统一并发下载
+            self.image_tasks.append((img_url, os.path.join(self.output_dir, img_path)))
+        except Exception as e:
+            self.parser.log('warning', f"Error processing image {img.get('data-src', img.get('src', 'unknown'))}: {str(e)}")
+            # 继续处理下一张图片，不中断进程
+        return False
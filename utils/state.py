@@ -0,0 +1,246 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id      TEXT PRIMARY KEY,
+    item_type    TEXT NOT NULL DEFAULT '',
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    content_hash TEXT,
+    output_path  TEXT,
+    updated_at   REAL NOT NULL
+);
+-- 查询剩余条目按状态查找，并直接按尝试次数、ID 的顺序读出
+DROP INDEX IF EXISTS items_status;
+CREATE INDEX IF NOT EXISTS items_remaining ON items (status, attempts, item_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# 专栏下载状态的保存目录，按站点和专栏 ID 区分；未设置时保存在专栏的输出目录中，
+# 网页和接口每个请求的输出目录都是新建的，只有设置了该目录才能增量同步和断点续传
+STATE_DIR = os.environ.get("STATE_DIR") or None
+
+# 建表之后新增的列，打开旧数据库时补上
+ADDED_COLUMNS = (
+    ("url", "TEXT"),
+    # 条目在源站上的更新时间（秒），用于增量同步时判断是否需要重新下载
+    ("source_updated", "INTEGER"),
+)
+
+
+def file_sha256(path):
+    """
+    计算文件内容的 sha256，文件不存在时返回 None
+    """
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+    except OSError:
+        return None
+
+
+class StateStore:
+    """
+    专栏下载状态，保存在 SQLite 数据库中
+
+    每个条目一行，记录类型、状态（pending/done/failed）、尝试次数、最近一次错误、
+    输出文件的 sha256 和路径。数据库使用 WAL 模式，每个线程使用各自的连接，
+    多个线程可以同时读写。发现的条目先登记为 pending，中断后仍能知道剩余哪些条目；
+    按 (状态, 尝试次数, ID) 建有索引，查询剩余条目不需要扫描整张表，也不需要排序。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+        for name, declaration in ADDED_COLUMNS:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE items ADD COLUMN {name} {declaration}")
+
+    def connection(self):
+        """
+        返回当前线程的连接，第一次使用时创建
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None：单条语句自动提交，需要时显式开启事务
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """
+        关闭所有线程的连接，最后一个连接关闭时 WAL 会合并回数据库文件
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def delete(self):
+        """
+        关闭连接并删除数据库文件
+        """
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_items(self, items):
+        """
+        登记新发现的条目 (item_id, item_type, url)，已有的条目保持不变
+        """
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (item_id, item_type, url, updated_at) VALUES (?, ?, ?, ?)",
+                ((str(item_id), item_type, url, now) for item_id, item_type, url in items))
+
+    def mark_done(self, item_id, item_type="", output_path=None, content_hash=None, url=None,
+                  source_updated=None):
+        self.connection().execute(
+            """
+            INSERT INTO items (item_id, item_type, status, attempts, output_path, content_hash,
+                               url, source_updated, updated_at)
+            VALUES (?, ?, 'done', 1, ?, ?, ?, ?, ?)
+            ON CONFLICT (item_id) DO UPDATE SET
+                item_type = excluded.item_type, status = 'done', attempts = attempts + 1,
+                last_error = NULL, output_path = excluded.output_path,
+                content_hash = excluded.content_hash, url = coalesce(excluded.url, url),
+                source_updated = excluded.source_updated, updated_at = excluded.updated_at
+            """,
+            (str(item_id), item_type, output_path, content_hash, url, source_updated, time.time()))
+
+    def mark_failed(self, item_id, item_type="", error=None, url=None):
+        self.connection().execute(
+            """
+            INSERT INTO items (item_id, item_type, status, attempts, last_error, url, updated_at)
+            VALUES (?, ?, 'failed', 1, ?, ?, ?)
+            ON CONFLICT (item_id) DO UPDATE SET
+                item_type = excluded.item_type, status = 'failed', attempts = attempts + 1,
+                last_error = excluded.last_error, url = coalesce(excluded.url, url),
+                updated_at = excluded.updated_at
+            """,
+            (str(item_id), item_type, error, url, time.time()))
+
+    def set_source_updated(self, item_id, source_updated):
+        self.connection().execute(
+            "UPDATE items SET source_updated = ? WHERE item_id = ?", (source_updated, str(item_id)))
+
+    def source_versions(self, status=DONE):
+        """
+        返回指定状态的条目 {item_id: source_updated}
+        """
+        rows = self.connection().execute(
+            "SELECT item_id, source_updated FROM items WHERE status = ?", (status,))
+        return dict(rows)
+
+    def get(self, item_id):
+        """
+        返回条目的记录（dict），不存在时返回 None
+        """
+        conn = self.connection()
+        cursor = conn.execute("SELECT * FROM items WHERE item_id = ?", (str(item_id),))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip((column[0] for column in cursor.description), row))
+
+    def ids(self, status):
+        """
+        返回指定状态的全部条目 ID
+        """
+        rows = self.connection().execute("SELECT item_id FROM items WHERE status = ?", (status,))
+        return {item_id for item_id, in rows}
+
+    def remaining(self, limit=None):
+        """
+        返回尚未完成的条目 [(item_id, item_type, url, status, attempts)]，失败次数少的在前
+        """
+        # 每个状态在索引上各查找一次再按顺序合并；status != 'done' 或 IN 会扫描整张表再排序
+        columns = "SELECT item_id, item_type, url, status, attempts FROM items"
+        sql = (f"{columns} WHERE status = '{PENDING}' UNION ALL "
+               f"{columns} WHERE status = '{FAILED}' ORDER BY attempts, item_id")
+        if limit is not None:
+            return self.connection().execute(sql + " LIMIT ?", (limit,)).fetchall()
+        return self.connection().execute(sql).fetchall()
+
+    def counts(self):
+        """
+        返回各状态的条目数
+        """
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        counts.update(self.connection().execute("SELECT status, COUNT(*) FROM items GROUP BY status"))
+        return counts
+
+    def get_meta(self, key, default=None):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def set_meta(self, key, value):
+        self.connection().execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, str(value)))
+
+    def import_text_files(self, processed_filename, failed_filename):
+        """
+        导入旧版本按行记录 ID 的已处理 / 失败文件，导入后删除这两个文件
+        """
+        def read_ids(filename):
+            if not os.path.exists(filename):
+                return []
+            with open(filename, 'r', encoding='utf-8') as file:
+                return [line.strip() for line in file if line.strip()]
+
+        processed, failed = read_ids(processed_filename), read_ids(failed_filename)
+        processed_set = set(processed)
+        now = time.time()
+        conn = self.connection()
+        with conn:
+            conn.execute("BEGIN")
+            # 失败文件在重试成功后才会更新，同时出现在两个文件中的以已处理为准
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (item_id, status, attempts, updated_at) VALUES (?, 'failed', 1, ?)",
+                ((item_id, now) for item_id in failed if item_id not in processed_set))
+            conn.executemany(
+                """
+                INSERT INTO items (item_id, status, attempts, updated_at) VALUES (?, 'done', 1, ?)
+                ON CONFLICT (item_id) DO UPDATE SET status = 'done', last_error = NULL
+                """,
+                ((item_id, now) for item_id in processed))
+        for filename in (processed_filename, failed_filename):
+            if os.path.exists(filename):
+                os.remove(filename)
+        return len(processed) + len(failed)
@@ -1,12 +1,78 @@
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def insert_new_line(soup, element, num_breaks):
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.cache import image_cache, replace_file
+from utils.ratelimit import rate_limiter
+from utils.metrics import BYTES_DOWNLOADED, CACHE_HITS, CACHE_MISSES, IMAGES_FETCHED
+from utils.profiling import profile_initializer
+
+
+# HTML 解析器，可选 "html.parser" 或 "lxml"
+HTML_PARSER = os.environ.get("HTML_PARSER", "html.parser")
+
+
+class NodeStrainer(SoupStrainer):
+    """
+    只保留与选择器匹配的节点（及其全部子孙节点）的 SoupStrainer
+
+    选择器只支持 "tag"、"tag.class"、"tag#id" 三种简单形式。
+    """
+
+    def __init__(self, selectors):
+        super().__init__()
+        self.rules = []
+        for selector in selectors:
+            match = re.match(r"^([\w-]+)?(?:\.([\w-]+)|#([\w-]+))?$", selector)
+            if not match:
+                raise ValueError(f"Unsupported selector: {selector}")
+            self.rules.append(match.groups())
+
+    def matches_node(self, name, attrs):
+        attrs = attrs or {}
+        classes = attrs.get("class") or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for tag_name, class_name, element_id in self.rules:
+            if tag_name and tag_name != name:
+                continue
+            if class_name and class_name not in classes:
+                continue
+            if element_id and attrs.get("id") != element_id:
+                continue
+            return True
+        return False
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self.matches_node(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if hasattr(markup_name, "name"):
+            return self.matches_node(markup_name.name, markup_name.attrs)
+        return self.matches_node(markup_name, dict(markup_attrs))
+
+
+def make_soup(markup, parser=None, selectors=None):
     """
-    在指定位置插入换行符
+    解析 HTML 页面
+
+    parser 默认为 HTML_PARSER；传入 selectors 时只构建与之匹配的节点，
+    第一个选择器应为页面正文，页面中没有正文节点时（如登录页、404 页）退回到完整解析。
     """
-    for _ in range(num_breaks):
-        new_line = soup.new_tag('br')
-        element.insert_after(new_line)
+    parser = parser or HTML_PARSER
+    if selectors:
+        soup = BeautifulSoup(markup, parser, parse_only=NodeStrainer(selectors))
+        if soup.select_one(selectors[0]) is not None:
+            return soup
+    return BeautifulSoup(markup, parser)
 
 
 def get_article_date(soup, name):
@@ -46,27 +112,146 @@ def get_article_date_weixin(date_element):
     return "Unknown"
 
 
-def download_image(url, save_path, session):
+def download_image(url, save_path, session, site=None, on_bytes=None):
     """
-    从指定url下载图片并保存到本地
+    从指定url下载图片并保存到本地，site 用于按站点统计，下载的字节数传给 on_bytes(count)
     """
+    site = site or "unknown"
     if url.startswith("data:image/"):
         # 如果链接以 "data:" 开头，则直接写入数据到文件
-        with open(save_path, "wb") as f:
-            f.write(url.split(",", 1)[1].encode("utf-8"))
+        replace_file(save_path, url.split(",", 1)[1].encode("utf-8"))
     else:
-        response = session.get(url)
-        with open(save_path, "wb") as f:
-            f.write(response.content)
+        # 先查找本地图片缓存，命中则不再请求网络
+        if image_cache.enabled:
+            if image_cache.fetch(url, save_path):
+                CACHE_HITS.inc(site=site, cache="image")
+                IMAGES_FETCHED.inc(site=site)
+                return
+            CACHE_MISSES.inc(site=site, cache="image")
+        response = rate_limiter.request(session, url)
+        response.raise_for_status()
+        # 不能原地写入：save_path 可能是之前缓存命中时链接进来的缓存对象
+        replace_file(save_path, response.content)
+        BYTES_DOWNLOADED.inc(len(response.content), site=site, kind="image")
+        if on_bytes is not None:
+            on_bytes(len(response.content))
+        image_cache.store(url, save_path)
+    IMAGES_FETCHED.inc(site=site)
+
+
+def download_images(tasks, session, max_workers=8, on_error=None, site=None, on_bytes=None):
+    """
+    使用线程池并发下载多张图片
+
+    tasks 为 (url, save_path) 列表，单张图片失败时调用 on_error(url, save_path, exc)，
+    不影响其他图片的下载。site 用于按站点统计，on_bytes 见 download_image。返回成功下载的图片数量。
+    """
+    if not tasks:
+        return 0
+
+    def fetch(url, save_path):
+        directory = os.path.dirname(save_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        download_image(url, save_path, session, site, on_bytes)
+
+    # 同一文件只下载一次，避免多个线程同时写入
+    unique_tasks = {}
+    for url, save_path in tasks:
+        unique_tasks.setdefault(save_path, url)
+    tasks = [(url, save_path) for save_path, url in unique_tasks.items()]
+
+    downloaded = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks))),
+                            initializer=profile_initializer()) as executor:
+        futures = {executor.submit(fetch, url, save_path): (url, save_path)
+                   for url, save_path in tasks}
+        for future in as_completed(futures):
+            url, save_path = futures[future]
+            try:
+                future.result()
+                downloaded += 1
+            except Exception as e:
+                if on_error is not None:
+                    on_error(url, save_path, e)
+    return downloaded
+
+
+def download_video(url, save_path, session, chunk_size=1024 * 1024, max_retries=3, site=None, on_bytes=None):
+    """
+    从指定url流式下载视频并保存到本地
+
+    数据按块写入 save_path + ".part"，中断后通过 HTTP Range 续传，
+    下载完成并校验 Content-Length 后再重命名为 save_path。
+    """
+    part_path = save_path + ".part"
+    expected_size = None
+
+    for attempt in range(max_retries + 1):
+        downloaded = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={downloaded}-"} if downloaded else {}
+
+        try:
+            with rate_limiter.request(session, url, headers=headers, stream=True, timeout=(10, 60)) as response:
+                if response.status_code == 416:
+                    # 已下载的部分超出了服务器文件大小，说明 .part 文件有误，重新下载
+                    os.remove(part_path)
+                    continue
+                response.raise_for_status()
+
+                if downloaded and response.status_code == 206:
+                    mode = "ab"
+                    content_range = response.headers.get("Content-Range", "")
+                    if "/" in content_range and content_range.rsplit("/", 1)[1].isdigit():
+                        expected_size = int(content_range.rsplit("/", 1)[1])
+                else:
+                    # 服务器不支持 Range，只能从头开始
+                    mode = "wb"
+                    downloaded = 0
+                    content_length = response.headers.get("Content-Length")
+                    if content_length and content_length.isdigit():
+                        expected_size = int(content_length)
+
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            BYTES_DOWNLOADED.inc(len(chunk), site=site or "unknown", kind="video")
+                            if on_bytes is not None:
+                                on_bytes(len(chunk))
+        except requests.exceptions.RequestException:
+            if attempt == max_retries:
+                raise
+            continue
+
+        actual_size = os.path.getsize(part_path)
+        if expected_size is not None and actual_size < expected_size:
+            # 连接提前断开，继续续传剩余部分
+            if attempt == max_retries:
+                raise IOError(
+                    f"Incomplete video download: {actual_size} of {expected_size} bytes")
+            continue
+        if expected_size is not None and actual_size != expected_size:
+            raise IOError(
+                f"Video size mismatch: expected {expected_size} bytes, got {actual_size}")
+
+        os.replace(part_path, save_path)
+        return
+
+    raise IOError(f"Failed to download video after {max_retries + 1} attempts: {url}")
 
 
-def download_video(url, save_path, session):
+def format_math(formula, block=False, hexo_uploader=False):
     """
-    从指定url下载视频并保存到本地
+    将 LaTeX 公式转换为 Markdown 格式
     """
-    response = session.get(url)
-    with open(save_path, "wb") as f:
-        f.write(response.content)
+    delimiter = "$$" if block else "$"
+    if hexo_uploader:
+        return delimiter + "{% raw %}" + formula + "{% endraw %}" + delimiter
+    # 如果公式中包含 $ 则不再添加 $ 符号
+    if formula.find("$") != -1:
+        return formula
+    return f"{delimiter}{formula}{delimiter}"
 
 
 def get_valid_filename(s):
@@ -0,0 +1,84 @@
+import io
+import logging
+import os
+import shutil
+import time
+import zipfile
+
+from utils.metrics import STAGE_SECONDS
+
+logger = logging.getLogger('web_app')
+
+SUPPORTED_EXTENSIONS = ['.md', '.jpg', '.png', '.gif', '.mp4', '.txt', '.json', '.prof', '.folded']
+LOG_FILES = ['zhihu_download.log', 'weixin_download.log', 'csdn_download.log', 'juejin_download.log']
+
+
+class ZipStreamBuffer(io.RawIOBase):
+    """
+    不可 seek 的写入缓冲区，zipfile 写入的数据暂存于此，由生成器取出后发送
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_zip_files(directory):
+    """
+    遍历目录中需要打包的文件，返回 (文件路径, 压缩包内路径)
+    """
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if any(file.endswith(ext) for ext in SUPPORTED_EXTENSIONS) or file in LOG_FILES:
+                file_path = os.path.join(root, file)
+                yield file_path, os.path.relpath(file_path, directory)
+
+
+def stream_zip_from_directory(directory, chunk_size=1024 * 1024, cleanup=False, site=None):
+    """
+    从给定目录边打包边输出 ZIP 数据块，不在磁盘或内存中保留完整的压缩包
+
+    cleanup 为 True 时，发送结束（或客户端断开）后删除该目录。
+    打包耗时（包括等待客户端接收的时间）按 site 记录到 zip 阶段。
+    """
+    buffer = ZipStreamBuffer()
+    start = time.perf_counter()
+    try:
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for file_path, arcname in iter_zip_files(directory):
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                with open(file_path, "rb") as src, zf.open(zinfo, "w") as dst:
+                    while True:
+                        data = src.read(chunk_size)
+                        if not data:
+                            break
+                        dst.write(data)
+                        chunk = buffer.pop()
+                        if chunk:
+                            yield chunk
+                chunk = buffer.pop()
+                if chunk:
+                    yield chunk
+        # 写入中央目录
+        chunk = buffer.pop()
+        if chunk:
+            yield chunk
+    except Exception as e:
+        logger.error(f"Error creating zip stream: {str(e)}")
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, site=site or "unknown", stage="zip")
+        if cleanup:
+            shutil.rmtree(directory, ignore_errors=True)